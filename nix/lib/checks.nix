@@ -158,6 +158,7 @@ let
           pkgs.python3.pkgs.pip
           pkgs.python3.pkgs.virtualenv
           pkgs.python3.pkgs.pytest # Need pytest to run the tests
+          pkgs.python3.pkgs.pytest-xdist # Runs the release tests in parallel (see PYTEST_ADDOPTS below)
         ];
       };
 
@@ -231,6 +232,8 @@ let
         testConfig = testConfig // {
           extraEnvVars = testConfig.extraEnvVars or { } // {
             WHEEL_CACHE_DIR = "${wheelCache}";
+            # Give each Python version its own xdist worker, so their virtualenvs are built in parallel
+            PYTEST_ADDOPTS = "-n auto --dist loadgroup";
             # Set wheel path via environment variable - read the actual wheel filename
             HTTY_WHEEL_PATH =
               let
@@ -1,23 +1,31 @@
+import atexit
 import json
 import logging
 import os
 import queue
-import shutil
 import signal
+import stat
 import subprocess
+import sys
 import threading
 import time
-from contextlib import contextmanager
+from contextlib import ExitStack, contextmanager
 from dataclasses import dataclass
 from pathlib import Path
 from queue import Queue
 from time import sleep
-from typing import Any, Dict, Iterator, List, Optional, Union
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple, Union
 
 from ansi2html import Ansi2HTMLConverter
 
 from .keys import KeyInput, Press, keys_to_strings
 
+if TYPE_CHECKING:
+    if sys.version_info >= (3, 11):
+        from importlib.resources.abc import Traversable
+    else:
+        from importlib.abc import Traversable
+
 # Constants
 DEFAULT_SLEEP_AFTER_KEYS = 0.1
 DEFAULT_SUBPROCESS_WAIT_TIMEOUT = 2.0
@@ -28,6 +36,17 @@ SNAPSHOT_RETRY_TIMEOUT = 0.5
 SUBPROCESS_EXIT_DETECTION_DELAY = 0.2
 MAX_SNAPSHOT_RETRIES = 10
 
+# The last resolved ht binary path, keyed on the (HTTY_HT_BIN, PATH) values it was resolved under
+_resolved: Optional[Tuple[Tuple[str, str], str]] = None
+
+# The last ht found on PATH, keyed on the PATH it was found under (misses aren't kept)
+_path_ht: Optional[Tuple[str, str]] = None
+
+# On-disk location of the bundled ht binary, and whatever keeps it there if importlib.resources had to extract it
+_bundled_ht_path: Optional[str] = None
+_BUNDLED_HT_FILES = ExitStack()
+atexit.register(_BUNDLED_HT_FILES.close)
+
 
 @dataclass
 class HTBinary:
@@ -46,17 +65,30 @@ class HTBinary:
         return subprocess.Popen(cmd, **kwargs)
 
 
+def reset_cache() -> None:
+    """
+    Forget the memoized ht binary location, so the next ht_binary() resolves it again.
+
+    Mainly a test hook: the memo already follows changes to HTTY_HT_BIN and PATH.
+    """
+    global _resolved, _path_ht, _bundled_ht_path
+    _resolved = None
+    _path_ht = None
+    _bundled_ht_path = None
+    # Release any extracted copy of the bundled ht, rather than leaving one behind per reset
+    _BUNDLED_HT_FILES.close()
+
+
 def _try_user_specified_binary() -> Optional[str]:
     """Try to use user-specified ht binary from HTTY_HT_BIN environment variable."""
     user_ht = os.environ.get("HTTY_HT_BIN")
     if not user_ht or not user_ht.strip():
         return None
 
-    user_ht_path = Path(user_ht)
-    if user_ht_path.is_file() and os.access(str(user_ht_path), os.X_OK):
+    if _is_executable_file(user_ht):
         logger = logging.getLogger(__name__)
         logger.info("Using user-specified ht binary from HTTY_HT_BIN")
-        return str(user_ht_path)
+        return str(Path(user_ht))
     else:
         raise RuntimeError(
             f"HTTY_HT_BIN='{user_ht}' is not a valid executable file. "
@@ -64,8 +96,32 @@ def _try_user_specified_binary() -> Optional[str]:
         )
 
 
+def _is_executable_file(path: str) -> bool:
+    """Whether `path` is a regular file with an execute bit set (one stat() answers both)."""
+    try:
+        mode = os.stat(path).st_mode
+    except OSError:
+        return False
+    return stat.S_ISREG(mode) and bool(mode & 0o111)
+
+
+def _bundled_exists(ht_resource: "Traversable") -> bool:
+    """Whether the package ships a bundled ht binary (kept separate so tests can replace just this check)."""
+    return ht_resource.is_file()
+
+
 def _try_bundled_binary() -> Optional[str]:
-    """Try to use bundled ht binary."""
+    """Try to use bundled ht binary, making it available on disk at most once per process."""
+    global _bundled_ht_path
+    if _bundled_ht_path is not None:
+        if _is_executable_file(_bundled_ht_path):
+            logger = logging.getLogger(__name__)
+            logger.info("Using bundled ht binary")
+            return _bundled_ht_path
+        # Something removed it since, so drop whatever held it and make it available again
+        _bundled_ht_path = None
+        _BUNDLED_HT_FILES.close()
+
     try:
         from importlib import resources as impresources
 
@@ -74,12 +130,15 @@ def _try_bundled_binary() -> Optional[str]:
         bundled_files = impresources.files(_bundled)
         ht_resource = bundled_files / "ht"
 
-        if ht_resource.is_file():
+        if _bundled_exists(ht_resource):
             logger = logging.getLogger(__name__)
             logger.info("Using bundled ht binary")
-            with impresources.as_file(ht_resource) as ht_path:
+            # Keep the file around for the life of the process, not just this call
+            ht_path = _BUNDLED_HT_FILES.enter_context(impresources.as_file(ht_resource))
+            if not os.access(str(ht_path), os.X_OK):
                 os.chmod(str(ht_path), 0o755)
-                return str(ht_path)
+            _bundled_ht_path = str(ht_path)
+            return _bundled_ht_path
         else:
             return None
 
@@ -89,9 +148,32 @@ def _try_bundled_binary() -> Optional[str]:
         return None
 
 
+def _find_ht_on_path(search_path: str) -> Optional[str]:
+    """Return the first executable `ht` in the given PATH string."""
+    for directory in search_path.split(os.pathsep):
+        if not directory:
+            continue
+        candidate = os.path.join(directory, "ht")
+        if _is_executable_file(candidate):
+            return candidate
+    return None
+
+
+def _system_ht() -> Optional[str]:
+    """Locate `ht` on PATH, only scanning again when PATH has changed or the last hit is gone."""
+    global _path_ht
+    search_path = os.environ.get("PATH", os.defpath)
+    if _path_ht is not None and _path_ht[0] == search_path and _is_executable_file(_path_ht[1]):
+        return _path_ht[1]
+
+    found = _find_ht_on_path(search_path)
+    _path_ht = (search_path, found) if found else None
+    return found
+
+
 def _try_system_binary() -> Optional[str]:
     """Try to use system ht binary from PATH."""
-    system_ht = shutil.which("ht")
+    system_ht = _system_ht()
     if system_ht:
         logger = logging.getLogger(__name__)
         logger.warning(
@@ -119,15 +201,25 @@ def ht_binary() -> Iterator[HTBinary]:
             cmd = ht.build_command("--help")
             ht_proc = ht.run_subprocess("--version")
 
+    The resolved path is memoized for as long as HTTY_HT_BIN and PATH keep the same values
+    and the file is still an executable.
+
     Raises:
         RuntimeError: If ht binary cannot be found anywhere
     """
+    global _resolved
+
+    cache_key = (os.environ.get("HTTY_HT_BIN", ""), os.environ.get("PATH", os.defpath))
+    if _resolved is not None and _resolved[0] == cache_key and _is_executable_file(_resolved[1]):
+        yield HTBinary(_resolved[1])
+        return
 
     # Try each strategy in order
     for strategy in [_try_user_specified_binary, _try_bundled_binary, _try_system_binary]:
         try:
             ht_path = strategy()
             if ht_path:
+                _resolved = (cache_key, ht_path)
                 yield HTBinary(ht_path)
                 return
         except RuntimeError:
@@ -0,0 +1,13 @@
+"""Shared pytest configuration for the htty test suites."""
+
+import pytest
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    parser.addoption(
+        "--htty-python",
+        action="append",
+        default=[],
+        metavar="VERSION",
+        help="only run the release tests against this Python version (may be given more than once)",
+    )
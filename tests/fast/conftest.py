@@ -0,0 +1,119 @@
+"""Shared pytest configuration for the fast tests."""
+
+import os
+from pathlib import Path
+from textwrap import dedent
+from typing import Generator, List
+
+import pytest
+
+from htty import ht
+
+_HELLO_BYTES = dedent("""
+    print("hello")
+    input()
+    print("world")
+    input()
+    print("goodbye")
+""").encode("utf-8")
+
+_COLORED_BYTES = dedent("""
+    print("\\033[31mhello\\033[0m")
+    input()
+    print("\\033[32mworld\\033[0m")
+    input()
+    print("\\033[33mgoodbye\\033[0m")
+""").encode("utf-8")
+
+_GREETER_BYTES = dedent("""
+    name = input()
+    print("hello", name)
+""").encode("utf-8")
+
+
+_LEADING_EMPTY_LINE_BYTES = b'print()  # Empty line\nprint("hello")\n'
+
+
+def pytest_collection_modifyitems(config: pytest.Config, items: List[pytest.Item]) -> None:
+    """Skip the vim tests up front when there is no vim to drive, instead of in each test body."""
+    if "HTTY_TEST_VIM_TARGET" in os.environ:
+        return
+    skip_vim = pytest.mark.skip(reason="HTTY_TEST_VIM_TARGET not set - please run in nix devshell")
+    for item in items:
+        if item.get_closest_marker("vim") is not None:
+            item.add_marker(skip_vim)
+
+
+@pytest.fixture(autouse=True)
+def _reset_ht_binary_cache() -> Generator[None, None, None]:
+    """
+    Make each test resolve the ht binary afresh, so patched environments and mocks take effect,
+    and forget whatever it resolved afterwards so nothing found under those patches leaks into later tests.
+    """
+    ht.reset_cache()
+    yield
+    ht.reset_cache()
+
+
+@pytest.fixture
+def no_bundled(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Simulate an install without a bundled ht binary."""
+    monkeypatch.setattr(ht, "_bundled_exists", lambda ht_resource: False)
+
+
+@pytest.fixture(scope="session")
+def hello_world_script(tmp_path_factory: pytest.TempPathFactory) -> str:
+    """A script that prints hello, world and goodbye, waiting for a line of input between each."""
+    # The script is never modified, so every test in the session can share one copy
+    script_path = tmp_path_factory.mktemp("scripts") / "hello_world.py"
+    script_path.write_bytes(_HELLO_BYTES)
+    return str(script_path)
+
+
+@pytest.fixture(scope="session")
+def colored_hello_world_script(tmp_path_factory: pytest.TempPathFactory) -> str:
+    """Like hello_world_script, but each word is printed in a different ANSI color."""
+    script_path = tmp_path_factory.mktemp("scripts") / "colored_hello_world.py"
+    script_path.write_bytes(_COLORED_BYTES)
+    return str(script_path)
+
+
+@pytest.fixture(scope="session")
+def greeter_script(tmp_path_factory: pytest.TempPathFactory) -> str:
+    """A script that reads a name and greets it."""
+    script_path = tmp_path_factory.mktemp("scripts") / "greeter.py"
+    script_path.write_bytes(_GREETER_BYTES)
+    return str(script_path)
+
+
+@pytest.fixture(scope="session")
+def leading_empty_line_script(tmp_path_factory: pytest.TempPathFactory) -> str:
+    """A script that prints an empty line followed by hello."""
+    script_path = tmp_path_factory.mktemp("scripts") / "leading_empty_line.py"
+    script_path.write_bytes(_LEADING_EMPTY_LINE_BYTES)
+    return str(script_path)
+
+
+def _write_file(path: Path, content: bytes, mode: int) -> None:
+    """Create a file that has the given permissions from the start, rather than chmod-ing it afterwards."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+    try:
+        os.write(fd, content)
+    finally:
+        os.close(fd)
+
+
+@pytest.fixture(scope="session")
+def executable_ht_stub(tmp_path_factory: pytest.TempPathFactory) -> str:
+    """An executable shell script standing in for an ht binary, shared by the whole session."""
+    stub = tmp_path_factory.mktemp("ht") / "ht_stub"
+    _write_file(stub, b"#!/bin/sh\necho 'mock ht'\n", 0o755)
+    return str(stub)
+
+
+@pytest.fixture(scope="session")
+def non_executable_stub(tmp_path_factory: pytest.TempPathFactory) -> str:
+    """A regular file without execute permission, shared by the whole session."""
+    stub = tmp_path_factory.mktemp("ht") / "not_executable"
+    _write_file(stub, b"not executable", 0o644)
+    return str(stub)
@@ -1,11 +1,9 @@
 """Tests for HTTY_HT_BIN environment variable functionality."""
 
 import os
-import stat
-import tempfile
+import re
 from pathlib import Path
-from typing import TYPE_CHECKING
-from unittest.mock import patch
+from typing import TYPE_CHECKING, Iterator, List
 
 import pytest
 
@@ -19,86 +17,62 @@ from htty.ht import ht_binary
 class TestHttyHTBin:
     """Test cases for HTTY_HT_BIN environment variable handling."""
 
+    @pytest.mark.usefixtures("no_bundled")
     def test_no_env_var_no_bundled_uses_system_ht(self, monkeypatch: "MonkeyPatch", caplog: "LoggingPlugin") -> None:
         """Test that without HTTY_HT_BIN and no bundled ht, system ht is used."""
+        from unittest.mock import patch
+
         # Set logging level to capture WARNING messages
         with caplog.at_level("WARNING", logger="htty.ht"):
             # Ensure HTTY_HT_BIN is not set
             monkeypatch.delenv("HTTY_HT_BIN", raising=False)
 
-            # Mock importlib.resources to simulate no bundled ht
-            with patch("importlib.resources.files") as mock_files:
-                mock_files.side_effect = ImportError("No bundled resources")
-
-                # Mock shutil.which to simulate system ht being available
-                with patch("shutil.which") as mock_which:
-                    mock_which.return_value = "/usr/bin/ht"
+            # Mock the PATH lookup to simulate system ht being available
+            with patch("htty.ht._system_ht") as mock_system_ht:
+                mock_system_ht.return_value = "/usr/bin/ht"
 
-                    with ht_binary() as ht:
-                        assert ht.path == "/usr/bin/ht"
-                        assert "Using system ht binary from PATH: /usr/bin/ht" in caplog.text
-                        assert "Expect trouble if this ht does not have the changes in this fork" in caplog.text
+                with ht_binary() as ht:
+                    assert ht.path == "/usr/bin/ht"
+                    assert "Using system ht binary from PATH: /usr/bin/ht" in caplog.text
+                    assert "Expect trouble if this ht does not have the changes in this fork" in caplog.text
 
-    def test_valid_env_var_is_used(self, monkeypatch: "MonkeyPatch", caplog: "LoggingPlugin") -> None:
+    def test_valid_env_var_is_used(
+        self, monkeypatch: "MonkeyPatch", caplog: "LoggingPlugin", executable_ht_stub: str
+    ) -> None:
         """Test that a valid HTTY_HT_BIN path is used."""
         with caplog.at_level("INFO", logger="htty.ht"):
-            with tempfile.NamedTemporaryFile(delete=False) as tmp:
-                tmp.write(b"#!/bin/sh\necho 'mock ht'\n")
-                tmp_path = tmp.name
-
-            # Make it executable
-            os.chmod(tmp_path, os.stat(tmp_path).st_mode | stat.S_IEXEC)
-
             # Set the environment variable
-            monkeypatch.setenv("HTTY_HT_BIN", tmp_path)
+            monkeypatch.setenv("HTTY_HT_BIN", executable_ht_stub)
 
-            try:
-                with ht_binary() as ht:
-                    assert ht.path == tmp_path
-                    assert "Using user-specified ht binary from HTTY_HT_BIN" in caplog.text
-            finally:
-                os.unlink(tmp_path)
+            with ht_binary() as ht:
+                assert ht.path == executable_ht_stub
+                assert "Using user-specified ht binary from HTTY_HT_BIN" in caplog.text
+
+    @pytest.mark.parametrize("kind", ["missing", "non_exec"])
+    def test_invalid_env_var_raises_error(
+        self, monkeypatch: "MonkeyPatch", request: pytest.FixtureRequest, kind: str
+    ) -> None:
+        """Test that a nonexistent or non-executable HTTY_HT_BIN path raises helpful error."""
+        if kind == "missing":
+            invalid_path = "/nonexistent/path/to/ht"
+        else:
+            invalid_path = request.getfixturevalue("non_executable_stub")
 
-    def test_nonexistent_env_var_raises_error(self, monkeypatch: "MonkeyPatch") -> None:
-        """Test that nonexistent HTTY_HT_BIN path raises helpful error."""
-        # Set environment variable to nonexistent path
-        nonexistent_path = "/nonexistent/path/to/ht"
-        monkeypatch.setenv("HTTY_HT_BIN", nonexistent_path)
+        # Set the environment variable
+        monkeypatch.setenv("HTTY_HT_BIN", invalid_path)
 
         with pytest.raises(RuntimeError) as exc_info:
             with ht_binary():
                 pass
 
         error_msg = str(exc_info.value)
-        assert f"HTTY_HT_BIN='{nonexistent_path}' is not a valid executable file" in error_msg
+        assert f"HTTY_HT_BIN='{invalid_path}' is not a valid executable file" in error_msg
         assert "Please check that the path exists and is executable" in error_msg
 
-    def test_non_executable_env_var_raises_error(self, monkeypatch: "MonkeyPatch") -> None:
-        """Test that non-executable HTTY_HT_BIN path raises helpful error."""
-        # Create a temporary non-executable file
-        with tempfile.NamedTemporaryFile(delete=False) as tmp:
-            tmp.write(b"not executable")
-            tmp_path = tmp.name
-
-        # Ensure it's NOT executable
-        os.chmod(tmp_path, 0o644)
-
-        # Set the environment variable
-        monkeypatch.setenv("HTTY_HT_BIN", tmp_path)
-
-        try:
-            with pytest.raises(RuntimeError) as exc_info:
-                with ht_binary():
-                    pass
-
-            error_msg = str(exc_info.value)
-            assert f"HTTY_HT_BIN='{tmp_path}' is not a valid executable file" in error_msg
-            assert "Please check that the path exists and is executable" in error_msg
-        finally:
-            os.unlink(tmp_path)
-
     def test_bundled_ht_used_when_present(self, monkeypatch: "MonkeyPatch", caplog: "LoggingPlugin") -> None:
         """Test that bundled ht is used when present and no env var is set."""
+        from unittest.mock import patch
+
         # Set logging level to capture INFO messages
         with caplog.at_level("INFO", logger="htty.ht"):
             # Ensure HTTY_HT_BIN is not set
@@ -117,115 +91,255 @@ class TestHttyHTBin:
                     assert ht.path == "/tmp/ht_test"
                     assert "Using bundled ht binary" in caplog.text
 
-    def test_env_var_overrides_bundled(self, monkeypatch: "MonkeyPatch", caplog: "LoggingPlugin") -> None:
+    def test_env_var_overrides_bundled(
+        self, monkeypatch: "MonkeyPatch", caplog: "LoggingPlugin", executable_ht_stub: str
+    ) -> None:
         """Test that HTTY_HT_BIN overrides bundled ht when both exist."""
+        from unittest.mock import patch
+
         # Set logging level to capture INFO messages
         with caplog.at_level("INFO", logger="htty.ht"):
-            # Create a temporary executable file
-            with tempfile.NamedTemporaryFile(delete=False) as tmp:
-                tmp.write(b"#!/bin/sh\necho 'custom ht'\n")
-                tmp_path = tmp.name
-
-            # Make it executable
-            os.chmod(tmp_path, os.stat(tmp_path).st_mode | stat.S_IEXEC)
-
             # Set the environment variable
-            monkeypatch.setenv("HTTY_HT_BIN", tmp_path)
+            monkeypatch.setenv("HTTY_HT_BIN", executable_ht_stub)
 
-            try:
-                # Mock the bundled ht to also exist
-                with patch("pathlib.Path.exists") as mock_exists:
-
-                    def exists_side_effect(path: Path) -> bool:
-                        if "_bundled" in str(path):
-                            return True
-                        return os.path.exists(path)
-
-                    mock_exists.side_effect = exists_side_effect
-
-                    with patch("pathlib.Path.is_file", return_value=True):
-                        with ht_binary() as ht:
-                            assert ht.path == tmp_path
-                            assert "Using user-specified ht binary from HTTY_HT_BIN" in caplog.text
-            finally:
-                os.unlink(tmp_path)
+            # Mock the bundled ht to also exist; it shouldn't even be looked for
+            with patch("htty.ht._try_bundled_binary", return_value="/tmp/ht_bundled") as mock_try_bundled:
+                with ht_binary() as ht:
+                    assert ht.path == executable_ht_stub
+                    assert "Using user-specified ht binary from HTTY_HT_BIN" in caplog.text
+                mock_try_bundled.assert_not_called()
 
+    @pytest.mark.usefixtures("no_bundled")
     def test_empty_env_var_ignored(self, monkeypatch: "MonkeyPatch", caplog: "LoggingPlugin") -> None:
         """Test that empty HTTY_HT_BIN is ignored and falls back to system ht."""
+        from unittest.mock import patch
+
         # Set logging level to capture WARNING messages
         with caplog.at_level("WARNING", logger="htty.ht"):
             monkeypatch.setenv("HTTY_HT_BIN", "")
 
-            # Mock importlib.resources to simulate no bundled ht
-            with patch("importlib.resources.files") as mock_files:
-                mock_files.side_effect = ImportError("No bundled resources")
-
-                # Mock shutil.which to simulate system ht being available
-                with patch("shutil.which") as mock_which:
-                    mock_which.return_value = "/usr/bin/ht"
+            # Mock the PATH lookup to simulate system ht being available
+            with patch("htty.ht._system_ht") as mock_system_ht:
+                mock_system_ht.return_value = "/usr/bin/ht"
 
-                    with ht_binary() as ht:
-                        assert ht.path == "/usr/bin/ht"
-                        assert "Using system ht binary from PATH: /usr/bin/ht" in caplog.text
-                        assert "Expect trouble if this ht does not have the changes in this fork" in caplog.text
+                with ht_binary() as ht:
+                    assert ht.path == "/usr/bin/ht"
+                    assert "Using system ht binary from PATH: /usr/bin/ht" in caplog.text
+                    assert "Expect trouble if this ht does not have the changes in this fork" in caplog.text
 
+    @pytest.mark.usefixtures("no_bundled")
     def test_helpful_error_message_content(self, monkeypatch: "MonkeyPatch") -> None:
         """Test that helpful error message is shown when no ht binary is found anywhere."""
+        from unittest.mock import patch
+
         # Ensure HTTY_HT_BIN is not set
         monkeypatch.delenv("HTTY_HT_BIN", raising=False)
 
-        # Mock importlib.resources to simulate no bundled ht
-        with patch("importlib.resources.files") as mock_files:
-            mock_files.side_effect = ImportError("No bundled resources")
-
-            # Mock shutil.which to simulate no system ht available
-            with patch("shutil.which") as mock_which:
-                mock_which.return_value = None
-
-                with pytest.raises(RuntimeError) as exc_info:
-                    with ht_binary():
-                        pass
-
-                error_msg = str(exc_info.value)
-                # Check that helpful error message parts are present
-                expected_parts = [
-                    "Could not find ht binary",
-                    "installed from source",
-                    "Install ht separately",
-                    "Set HTTY_HT_BIN to point to ht binary",
-                    "https://github.com/andyk/ht",
-                ]
-                for part in expected_parts:
-                    assert part in error_msg, f"Missing expected part: {part}"
-
-    def test_ht_binary_helper_methods(self, monkeypatch: "MonkeyPatch") -> None:
-        """Test that HTBinary helper methods work correctly."""
-        # Create a temporary executable file
-        with tempfile.NamedTemporaryFile(delete=False) as tmp:
-            tmp.write(b"#!/bin/sh\necho 'mock ht'\n")
-            tmp_path = tmp.name
+        # Mock the PATH lookup to simulate no system ht available
+        with patch("htty.ht._system_ht") as mock_system_ht:
+            mock_system_ht.return_value = None
 
-        # Make it executable
-        os.chmod(tmp_path, os.stat(tmp_path).st_mode | stat.S_IEXEC)
+            with pytest.raises(RuntimeError) as exc_info:
+                with ht_binary():
+                    pass
 
+            error_msg = str(exc_info.value)
+            # Check that helpful error message parts are present
+            expected_parts = [
+                "Could not find ht binary",
+                "installed from source",
+                "Install ht separately",
+                "Set HTTY_HT_BIN to point to ht binary",
+                "https://github.com/andyk/ht",
+            ]
+            # One pass over the message finds every expected part that's present
+            found = set(re.findall("|".join(map(re.escape, expected_parts)), error_msg))
+            missing = set(expected_parts) - found
+            assert not missing, f"Missing expected parts: {missing}"
+
+    def test_ht_binary_helper_methods(self, monkeypatch: "MonkeyPatch", executable_ht_stub: str) -> None:
+        """Test that HTBinary helper methods work correctly."""
         # Set the environment variable
-        monkeypatch.setenv("HTTY_HT_BIN", tmp_path)
+        monkeypatch.setenv("HTTY_HT_BIN", executable_ht_stub)
+
+        with ht_binary() as ht:
+            # Test build_command method
+            cmd = ht.build_command("--help", "--version")
+            assert cmd == [executable_ht_stub, "--help", "--version"]
+
+            # Test that run_subprocess method returns a Popen object
+            import subprocess
+
+            proc = ht.run_subprocess("--help", stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            assert isinstance(proc, subprocess.Popen)
+            # The stub exits on its own, so just reap it; only kill it if it somehow hangs
+            try:
+                proc.communicate(timeout=1)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.communicate()
+
+    def test_resolution_is_memoized(self, monkeypatch: "MonkeyPatch", executable_ht_stub: str) -> None:
+        """Test that the resolved binary is reused until HTTY_HT_BIN changes."""
+        from unittest.mock import patch
+
+        monkeypatch.setenv("HTTY_HT_BIN", executable_ht_stub)
 
-        try:
+        with ht_binary() as ht:
+            assert ht.path == executable_ht_stub
+
+        # A repeat lookup with the same HTTY_HT_BIN doesn't resolve again
+        with patch("htty.ht._try_user_specified_binary") as mock_try_user:
             with ht_binary() as ht:
-                # Test build_command method
-                cmd = ht.build_command("--help", "--version")
-                assert cmd == [tmp_path, "--help", "--version"]
-
-                # Test that run_subprocess method returns a Popen object
-                import subprocess
-
-                proc = ht.run_subprocess("--help", stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                assert isinstance(proc, subprocess.Popen)
-                proc.terminate()  # Clean up
-                proc.wait()
-        finally:
-            os.unlink(tmp_path)
+                assert ht.path == executable_ht_stub
+            mock_try_user.assert_not_called()
+
+        # Changing HTTY_HT_BIN does
+        monkeypatch.setenv("HTTY_HT_BIN", "/nonexistent/path/to/ht")
+        with pytest.raises(RuntimeError):
+            with ht_binary():
+                pass
+
+    def test_system_ht_rescans_when_path_changes(self, monkeypatch: "MonkeyPatch", tmp_path: Path) -> None:
+        """Test that the cached PATH lookup is redone when PATH changes."""
+        from htty.ht import _system_ht
+
+        empty_dir = tmp_path / "empty"
+        empty_dir.mkdir()
+        bin_dir = tmp_path / "bin"
+        bin_dir.mkdir()
+        system_ht = bin_dir / "ht"
+        system_ht.write_bytes(b"#!/bin/sh\n")
+        system_ht.chmod(0o755)
+
+        monkeypatch.setenv("PATH", str(empty_dir))
+        assert _system_ht() is None
+
+        monkeypatch.setenv("PATH", os.pathsep.join([str(empty_dir), str(bin_dir)]))
+        assert _system_ht() == str(system_ht)
+
+    @pytest.mark.usefixtures("no_bundled")
+    def test_ht_binary_follows_path_changes(self, monkeypatch: "MonkeyPatch", tmp_path: Path) -> None:
+        """Test that a memoized system ht is not reused once PATH points somewhere else."""
+        monkeypatch.delenv("HTTY_HT_BIN", raising=False)
+
+        first_dir = tmp_path / "first"
+        second_dir = tmp_path / "second"
+        for bin_dir in (first_dir, second_dir):
+            bin_dir.mkdir()
+            (bin_dir / "ht").write_bytes(b"#!/bin/sh\n")
+            (bin_dir / "ht").chmod(0o755)
+
+        monkeypatch.setenv("PATH", str(first_dir))
+        with ht_binary() as ht:
+            assert ht.path == str(first_dir / "ht")
+
+        monkeypatch.setenv("PATH", str(second_dir))
+        with ht_binary() as ht:
+            assert ht.path == str(second_dir / "ht")
+
+    @pytest.mark.usefixtures("no_bundled")
+    def test_ht_binary_skips_deleted_system_ht(self, monkeypatch: "MonkeyPatch", tmp_path: Path) -> None:
+        """Test that a memoized system ht that has been deleted gives way to the next one on PATH."""
+        monkeypatch.delenv("HTTY_HT_BIN", raising=False)
+        first_dir = tmp_path / "first"
+        second_dir = tmp_path / "second"
+        for bin_dir in (first_dir, second_dir):
+            bin_dir.mkdir()
+            (bin_dir / "ht").write_bytes(b"#!/bin/sh\n")
+            (bin_dir / "ht").chmod(0o755)
+        monkeypatch.setenv("PATH", os.pathsep.join([str(first_dir), str(second_dir)]))
+
+        with ht_binary() as ht:
+            assert ht.path == str(first_dir / "ht")
+
+        (first_dir / "ht").unlink()
+        with ht_binary() as ht:
+            assert ht.path == str(second_dir / "ht")
+
+    def test_system_ht_finds_later_install(self, monkeypatch: "MonkeyPatch", tmp_path: Path) -> None:
+        """Test that a miss isn't remembered, so an ht installed later on the same PATH is found."""
+        from htty.ht import _system_ht
+
+        monkeypatch.setenv("PATH", str(tmp_path))
+        assert _system_ht() is None
+
+        (tmp_path / "ht").write_bytes(b"#!/bin/sh\n")
+        (tmp_path / "ht").chmod(0o755)
+        assert _system_ht() == str(tmp_path / "ht")
+
+    def test_memoized_env_binary_must_stay_executable(self, monkeypatch: "MonkeyPatch", tmp_path: Path) -> None:
+        """Test that a memoized HTTY_HT_BIN that loses its exec bit fails like a cold lookup would."""
+        user_ht = tmp_path / "ht"
+        user_ht.write_bytes(b"#!/bin/sh\n")
+        user_ht.chmod(0o755)
+        monkeypatch.setenv("HTTY_HT_BIN", str(user_ht))
+
+        with ht_binary() as ht:
+            assert ht.path == str(user_ht)
+
+        user_ht.chmod(0o644)
+        with pytest.raises(RuntimeError, match="is not a valid executable file"):
+            with ht_binary():
+                pass
+
+    def test_bundled_ht_is_located_once(self, tmp_path: Path) -> None:
+        """Test that the bundled ht is only looked up (and made executable) on first use."""
+        from unittest.mock import patch
+
+        from htty.ht import _try_bundled_binary
+
+        bundled_ht = tmp_path / "ht"
+        bundled_ht.write_bytes(b"#!/bin/sh\n")
+        bundled_ht.chmod(0o644)
+
+        with patch("importlib.resources.files", return_value=tmp_path):
+            assert _try_bundled_binary() == str(bundled_ht)
+        assert os.access(bundled_ht, os.X_OK)
+
+        with patch("importlib.resources.files") as mock_files:
+            assert _try_bundled_binary() == str(bundled_ht)
+            mock_files.assert_not_called()
+
+    def test_deleted_bundled_ht_is_not_reused(self, tmp_path: Path) -> None:
+        """Test that a remembered bundled ht that has since been deleted is looked up again."""
+        from unittest.mock import patch
+
+        from htty.ht import _try_bundled_binary
+
+        bundled_ht = tmp_path / "ht"
+        bundled_ht.write_bytes(b"#!/bin/sh\n")
+        bundled_ht.chmod(0o755)
+
+        with patch("importlib.resources.files", return_value=tmp_path):
+            assert _try_bundled_binary() == str(bundled_ht)
+            bundled_ht.unlink()
+            assert _try_bundled_binary() is None
+
+    def test_reset_cache_releases_bundled_ht(self, tmp_path: Path) -> None:
+        """Test that reset_cache() lets go of the bundled ht's on-disk copy instead of keeping it to exit."""
+        from contextlib import contextmanager
+        from unittest.mock import patch
+
+        from htty import ht
+        from htty.ht import _try_bundled_binary
+
+        bundled_ht = tmp_path / "ht"
+        bundled_ht.write_bytes(b"#!/bin/sh\n")
+        bundled_ht.chmod(0o755)
+        released: List[Path] = []
+
+        @contextmanager
+        def as_file(resource: Path) -> Iterator[Path]:
+            yield resource
+            released.append(resource)
+
+        with patch("importlib.resources.files", return_value=tmp_path), patch("importlib.resources.as_file", as_file):
+            assert _try_bundled_binary() == str(bundled_ht)
+        assert released == []
+
+        ht.reset_cache()
+        assert released == [bundled_ht]
 
 
 class TestHTBinaryIntegration:
@@ -4,69 +4,17 @@ Simple test using the htty module to make assertions about terminal output.
 
 import os
 import sys
-import tempfile
-from textwrap import dedent
-from typing import Generator
 
 import pytest
 
 from htty import Press, ht_process, run
 
-COLORED_HELLO_WORLD_SCRIPT = """
-print("\\033[31mhello\\033[0m")
-input()
-print("\\033[32mworld\\033[0m")
-input()
-print("\\033[33mgoodbye\\033[0m")
-"""
-
-
-@pytest.fixture
-def hello_world_script() -> Generator[str, None, None]:
-    with tempfile.NamedTemporaryFile(suffix=".py", delete=False) as tmp:
-        tmp.write(
-            dedent("""
-                print("hello")
-                input()
-                print("world")
-                input()
-                print("goodbye")
-            """).encode("utf-8")
-        )
-        tmp_path = tmp.name
-
-    yield tmp_path
-    try:
-        os.unlink(tmp_path)
-    except OSError:
-        pass
-
-
-@pytest.fixture
-def colored_hello_world_script() -> Generator[str, None, None]:
-    with tempfile.NamedTemporaryFile(suffix=".py", delete=False) as tmp:
-        tmp.write(
-            dedent(
-                """
-                print("\\033[31mhello\\033[0m")
-                input()
-                print("\\033[32mworld\\033[0m")
-                input()
-                print("\\033[33mgoodbye\\033[0m")
-                """
-            ).encode("utf-8")
-        )
-        tmp_path = tmp.name
-
-    yield tmp_path
-    try:
-        os.unlink(tmp_path)
-    except OSError:
-        pass
+# The test scripts only use builtins, so skip site.py and the user environment to start faster
+PYTHON = f"{sys.executable} -S -I"
 
 
 def test_hello_world_with_scrolling(hello_world_script: str) -> None:
-    cmd = f"{sys.executable} {hello_world_script}"
+    cmd = f"{PYTHON} {hello_world_script}"
     proc = run(cmd, rows=3, cols=8)
     assert proc.snapshot().text == ("hello   \n        \n        ")
 
@@ -76,7 +24,7 @@ def test_hello_world_with_scrolling(hello_world_script: str) -> None:
 
 
 def test_hello_world_after_exit(hello_world_script: str) -> None:
-    cmd = f"{sys.executable} {hello_world_script}"
+    cmd = f"{PYTHON} {hello_world_script}"
     ht = run(cmd, rows=6, cols=8)
     ht.send_keys(Press.ENTER)
     ht.send_keys(Press.ENTER)
@@ -89,7 +37,7 @@ def test_hello_world_after_exit(hello_world_script: str) -> None:
 
 
 def test_outputs(hello_world_script: str) -> None:
-    cmd = f"{sys.executable} {hello_world_script}"
+    cmd = f"{PYTHON} {hello_world_script}"
     ht = run(cmd, rows=4, cols=8)
     ht.send_keys(Press.ENTER)  # First input() call
     ht.send_keys(Press.ENTER)  # Second input() call to let script finish
@@ -98,7 +46,8 @@ def test_outputs(hello_world_script: str) -> None:
 
     # Be more tolerant of how output gets split across events
     # Just check that we got the expected content across all output events
-    all_output_text = "".join(str(event.get("data", {}).get("seq", "")) for event in ht.get_output())
+    events = ht.get_output()
+    all_output_text = "".join(event["data"]["seq"] for event in events)
 
     # Should contain all the expected text (now that we let it complete)
     assert "hello" in all_output_text, f"Expected 'hello' in output: {all_output_text}"
@@ -106,14 +55,14 @@ def test_outputs(hello_world_script: str) -> None:
     assert "goodbye" in all_output_text, f"Expected 'goodbye' in output: {all_output_text}"
 
     # Should have at least some output events
-    assert len(ht.get_output()) > 0, "Should have at least one output event"
+    assert len(events) > 0, "Should have at least one output event"
 
     ht.exit()  # Clean up the ht process
 
 
 def test_enum_keys_interface(hello_world_script: str) -> None:
     """Test that the new enum keys interface works correctly."""
-    cmd = f"{sys.executable} {hello_world_script}"
+    cmd = f"{PYTHON} {hello_world_script}"
     proc = run(cmd, rows=3, cols=8)
     proc.send_keys(Press.ENTER)
 
@@ -122,7 +71,7 @@ def test_enum_keys_interface(hello_world_script: str) -> None:
 
 def test_html_snapshot_with_colors(colored_hello_world_script: str) -> None:
     """Test that the new SnapshotResult provides HTML with color information."""
-    cmd = f"{sys.executable} {colored_hello_world_script}"
+    cmd = f"{PYTHON} {colored_hello_world_script}"
     proc = run(cmd, rows=4, cols=8)
 
     snapshot = proc.snapshot()
@@ -149,7 +98,7 @@ def test_html_snapshot_with_colors(colored_hello_world_script: str) -> None:
 
 def test_context_manager(hello_world_script: str) -> None:
     """Test the context manager API for automatic cleanup."""
-    cmd = f"{sys.executable} {hello_world_script}"
+    cmd = f"{PYTHON} {hello_world_script}"
 
     # Test that context manager works and cleans up automatically
     with ht_process(cmd, rows=3, cols=8) as proc:
@@ -161,7 +110,7 @@ def test_context_manager(hello_world_script: str) -> None:
 
 def test_exit_while_subprocess_running(hello_world_script: str) -> None:
     """Test that exit() works reliably even when subprocess is still running."""
-    cmd = f"{sys.executable} {hello_world_script}"
+    cmd = f"{PYTHON} {hello_world_script}"
     proc = run(cmd, rows=4, cols=8, no_exit=True)
 
     # Take initial snapshot
@@ -180,7 +129,7 @@ def test_exit_while_subprocess_running(hello_world_script: str) -> None:
 
 def test_exit_after_subprocess_finished(hello_world_script: str) -> None:
     """Test that exit() works when subprocess has already finished."""
-    cmd = f"{sys.executable} {hello_world_script}"
+    cmd = f"{PYTHON} {hello_world_script}"
     proc = run(cmd, rows=4, cols=8, no_exit=True)
 
     # Complete the script
@@ -205,12 +154,10 @@ def test_exit_after_subprocess_finished(hello_world_script: str) -> None:
 # CLI Example Tests - These translate CLI examples to Python API usage
 
 
+@pytest.mark.vim
 def test_vim_startup_screen() -> None:
     """Test equivalent to: htty --snapshot -- vim | grep "VIM - Vi IMproved" """
-    try:
-        vim_path = os.environ["htty_TEST_VIM_TARGET"]
-    except KeyError:
-        pytest.skip("htty_TEST_VIM_TARGET not set - please run in nix devshell")
+    vim_path = os.environ["HTTY_TEST_VIM_TARGET"]
 
     proc = run(vim_path, rows=20, cols=50)
 
@@ -222,17 +169,14 @@ def test_vim_startup_screen() -> None:
     assert improved_line == "~               VIM - Vi IMproved                 "
 
     # Exit vim
-    proc.send_keys(":q!")
-    proc.send_keys(Press.ENTER)
+    proc.send_keys([":q!", Press.ENTER])
     proc.exit()
 
 
+@pytest.mark.vim
 def test_vim_startup_screen_context_manager() -> None:
     """Test equivalent to: htty --snapshot -- vim | grep "VIM - Vi IMproved" (using context manager)"""
-    try:
-        vim_path = os.environ["htty_TEST_VIM_TARGET"]
-    except KeyError:
-        pytest.skip("htty_TEST_VIM_TARGET not set - please run in nix devshell")
+    vim_path = os.environ["HTTY_TEST_VIM_TARGET"]
 
     with ht_process(vim_path, rows=20, cols=50) as proc:
         snapshot = proc.snapshot()
@@ -242,30 +186,23 @@ def test_vim_startup_screen_context_manager() -> None:
     assert improved_line == "~               VIM - Vi IMproved                 "
 
 
+@pytest.mark.vim
 def test_vim_duplicate_line() -> None:
     """Test equivalent to: htty --rows 5 --cols 20 -k 'ihello,Escape' --snapshot
     -k 'Vyp,Escape' --snapshot -k ':q!,Enter' -- vim"""
-    try:
-        vim_path = os.environ["htty_TEST_VIM_TARGET"]
-    except KeyError:
-        pytest.skip("htty_TEST_VIM_TARGET not set - please run in nix devshell")
+    vim_path = os.environ["HTTY_TEST_VIM_TARGET"]
 
     proc = run(vim_path, rows=5, cols=20)
 
     # Send keys: "ihello,Escape" (enter insert mode, type hello, exit insert mode)
-    proc.send_keys("i")
-    proc.send_keys("hello")
-    proc.send_keys(Press.ESCAPE)
+    proc.send_keys(["i", "hello", Press.ESCAPE])
 
     # First snapshot - should show "hello"
     snapshot1 = proc.snapshot()
     assert "hello" in snapshot1.text
 
     # Send keys: "Vyp,Escape" (visual line mode, yank, put, escape)
-    proc.send_keys("V")  # Visual line mode
-    proc.send_keys("y")  # Yank (copy) the line
-    proc.send_keys("p")  # Put (paste) the line
-    proc.send_keys(Press.ESCAPE)  # Exit visual mode
+    proc.send_keys(["V", "y", "p", Press.ESCAPE])
 
     # Second snapshot - should show "hello" duplicated
     snapshot2 = proc.snapshot()
@@ -274,6 +211,5 @@ def test_vim_duplicate_line() -> None:
     assert len(hello_lines) >= 2, f"Expected duplicated 'hello' lines, got: {text_lines}"
 
     # Send keys: ":q!,Enter" (quit without saving)
-    proc.send_keys(":q!")
-    proc.send_keys(Press.ENTER)
+    proc.send_keys([":q!", Press.ENTER])
     proc.exit()
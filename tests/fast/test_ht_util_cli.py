@@ -1,28 +1,31 @@
-"""Tests for the htty command line interface via subprocess."""
+"""Tests for the htty command line interface, run in-process."""
 
+import contextlib
+import io
 import logging
 import os
 import re
 import subprocess
 import sys
-import tempfile
-from dataclasses import dataclass
-from pathlib import Path
-from textwrap import dedent
-from typing import Generator, List, Union
+from dataclasses import dataclass, field
+from typing import Callable, Generator, List, Sequence, Tuple, Union
 
 import pytest
 
-src_path = Path(__file__).parent.parent / "src"
-
-env = {**os.environ, "HTTY_HT_BIN": os.environ.get("HTTY_HT_BIN", "")}
+from htty import cli
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(frozen=True)
 class Pattern:
-    lines: List[Union[str, re.Pattern[str]]]
+    lines: Sequence[Union[str, "re.Pattern[str]"]]
+    # Which entries of `lines` are regexes, worked out once so matching doesn't re-check each line's type
+    is_regex: Tuple[bool, ...] = field(init=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "lines", tuple(self.lines))
+        object.__setattr__(self, "is_regex", tuple(isinstance(line, re.Pattern) for line in self.lines))
 
 
 def terminal_contents(*, actual_snapshots: str, expected_patterns: List[Pattern]) -> bool:
@@ -36,29 +39,32 @@ def terminal_contents(*, actual_snapshots: str, expected_patterns: List[Pattern]
         actual_lines.pop()
 
     # Strip trailing whitespace from each line but preserve empty lines
-    actual_lines = [line.rstrip() for line in actual_lines]
+    # (as a tuple, so that slices compare equal to a Pattern's lines)
+    stripped_lines = tuple(line.rstrip() for line in actual_lines)
 
-    pattern_idx = 0
+    # Walk the lines with a cursor rather than re-slicing the list after every pattern
+    cursor = 0
     for pattern_idx, pattern in enumerate(expected_patterns):
         # Check if there are enough lines left for this pattern
-        if len(actual_lines) < len(pattern.lines):
-            print(
-                f"Pattern {pattern_idx}: Not enough actual lines. "
-                f"Expected {len(pattern.lines)}, got {len(actual_lines)}"
-            )
+        remaining = len(stripped_lines) - cursor
+        if remaining < len(pattern.lines):
+            print(f"Pattern {pattern_idx}: Not enough actual lines. Expected {len(pattern.lines)}, got {remaining}")
             return False
 
-        # Match each line in the pattern
-        for line_idx, expected_line in enumerate(pattern.lines):
-            if line_idx >= len(actual_lines):
-                print(f"Pattern {pattern_idx}, line {line_idx}: Actual snapshot too short")
-                return False
+        # A pattern made only of literal lines can be checked with a single tuple comparison;
+        # the line-by-line walk below only runs for regexes or to report a mismatch
+        end = cursor + len(pattern.lines)
+        if not any(pattern.is_regex) and stripped_lines[cursor:end] == pattern.lines:
+            cursor = end
+            continue
 
-            actual_line = actual_lines[line_idx]
+        # Match each line in the pattern
+        for line_idx, (expected_line, is_regex) in enumerate(zip(pattern.lines, pattern.is_regex)):
+            actual_line = stripped_lines[cursor + line_idx]
 
-            if isinstance(expected_line, re.Pattern):
-                # This is a compiled regex pattern
-                if not expected_line.match(actual_line):
+            if is_regex:
+                # This is a compiled regex pattern, which must cover the whole line
+                if not expected_line.fullmatch(actual_line):
                     print(
                         f"Pattern {pattern_idx}, line {line_idx}: Regex {expected_line.pattern} "
                         f"failed to match '{actual_line}'"
@@ -70,33 +76,65 @@ def terminal_contents(*, actual_snapshots: str, expected_patterns: List[Pattern]
                     print(f"Pattern {pattern_idx}, line {line_idx}: Expected '{expected_line}', got '{actual_line}'")
                     return False
 
-        # Remove the matched lines from actual_lines for the next pattern
-        actual_lines = actual_lines[len(pattern.lines) :]
+        cursor = end
 
     return True
 
 
-def test_echo_hello() -> None:
-    cmd = [
-        *(sys.executable, "-m"),
-        "htty.cli",
+# Runs the CLI with the given arguments and returns what it printed, like subprocess.run would
+CliInvoke = Callable[..., "subprocess.CompletedProcess[str]"]
+
+
+@pytest.fixture
+def cli_invoke(monkeypatch: pytest.MonkeyPatch) -> Generator[CliInvoke, None, None]:
+    """
+    Run htty.cli.main() in the test process and capture its output, so the CLI tests don't each pay for
+    Python startup. The commands still get a terminal of their own from ht.
+    """
+    root_logger = logging.getLogger()
+    saved_handlers, saved_level = root_logger.handlers[:], root_logger.level
+
+    def invoke(args: List[str], check: bool = False) -> "subprocess.CompletedProcess[str]":
+        argv = ["htty", *args]
+        monkeypatch.setattr(sys, "argv", argv)
+        # main() configures logging on every call, so drop the handler left over from the last one
+        root_logger.handlers[:] = saved_handlers
+        stdout, stderr = io.StringIO(), io.StringIO()
+        returncode = 0
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                cli.main()
+            except SystemExit as e:
+                returncode = e.code if isinstance(e.code, int) else int(e.code is not None)
+        completed = subprocess.CompletedProcess(argv, returncode, stdout.getvalue(), stderr.getvalue())
+        if check:
+            completed.check_returncode()
+        return completed
+
+    yield invoke
+
+    # main() may have installed a handler bound to one of the captured streams; don't let it outlive the test
+    root_logger.handlers[:] = saved_handlers
+    root_logger.setLevel(saved_level)
+
+
+def test_echo_hello(cli_invoke: CliInvoke) -> None:
+    args = [
         *("-r", "2"),
         *("-c", "10"),
         "--",
         *("echo", "hello"),
     ]
 
-    ran = subprocess.run(cmd, capture_output=True, text=True, env=env)
+    ran = cli_invoke(args)
     # Remove the separator that gets added at the end
     expected_output = "hello\n\n"
     actual_output = ran.stdout.replace("----\n", "")
     assert actual_output == expected_output
 
 
-def test_keys_after_subproc_exit() -> None:
-    cmd = [
-        *(sys.executable, "-m"),
-        "htty.cli",
+def test_keys_after_subproc_exit(cli_invoke: CliInvoke) -> None:
+    args = [
         *("-r", "2"),
         *("-c", "10"),
         # echo hello will happen immediately and the subprocess will close
@@ -106,37 +144,15 @@ def test_keys_after_subproc_exit() -> None:
         *("echo", "hello"),
     ]
 
-    ran = subprocess.run(cmd, capture_output=True, text=True, env=env)
+    ran = cli_invoke(args)
     # Remove the separator that gets added at the end
     expected_output = "hello\n\n----\n"
     assert ran.stdout == expected_output
     print(ran.stderr)
 
 
-@pytest.fixture
-def greeter_script() -> Generator[str, None, None]:
-    with tempfile.NamedTemporaryFile(suffix=".py", delete=False) as tmp:
-        tmp.write(
-            dedent(
-                """
-                name = input()
-                print("hello", name)
-                """
-            ).encode("utf-8")
-        )
-        tmp_path = tmp.name
-
-    yield tmp_path
-    try:
-        os.unlink(tmp_path)
-    except OSError:
-        pass
-
-
-def test_send_keys(greeter_script: str) -> None:
-    cmd = [
-        *(sys.executable, "-m"),
-        "htty.cli",
+def test_send_keys(cli_invoke: CliInvoke, greeter_script: str) -> None:
+    args = [
         *("-r", "2"),
         *("-c", "10"),
         *("-k", "world,Backspace,Enter"),
@@ -144,27 +160,72 @@ def test_send_keys(greeter_script: str) -> None:
         *(sys.executable, greeter_script),
     ]
 
-    ran = subprocess.run(cmd, capture_output=True, text=True, check=True, env=env)
+    ran = cli_invoke(args, check=True)
     # Remove the separator that gets added at the end
     expected_output = "hello worl\n\n"
     actual_output = ran.stdout.replace("----\n", "")
     assert actual_output == expected_output
 
 
-def test_vim() -> None:
-    try:
-        vim_path = os.environ["HTTY_TEST_VIM_TARGET"]
-    except KeyError:
-        print(
-            "Please run this test in the nix devshell defined in {project_root}/nix/devshell.nix"
-            "doing so will provide a specific version of vim.\n"
-            "To do this, run `nix develop` at the repo root and then run the tests in that shell."
-        )
-        raise
-
-    cmd = [
-        *(sys.executable, "-m"),
-        "htty.cli",
+# vim's startup screen at the default 20x50 terminal size
+VIM_STARTUP_SCREEN = Pattern(
+    lines=[
+        "",
+        "~",
+        "~",
+        "~",
+        "~               VIM - Vi IMproved",
+        "~",
+        "~                version 9.1.1336",
+        "~            by Bram Moolenaar et al.",
+        "~  Vim is open source and freely distributable",
+        "~",
+        re.compile(r"~.*"),  # Variable vim message line 1
+        re.compile(r"~.*"),  # Variable vim message line 2
+        "~",
+        "~ type  :q<Enter>               to exit",
+        "~ type  :help<Enter>  or  <F1>  for on-line help",
+        "~ type  :help version9<Enter>   for version info",
+        "~",
+        "~",
+        "~",
+        "                                0,0-1         All",
+    ],
+)
+
+# The same screen after typing "hello" in insert mode and pressing Escape
+VIM_AFTER_HELLO_SCREEN = Pattern(
+    lines=[
+        "hello",
+        "~",
+        "~",
+        "~",
+        "~",
+        "~",
+        "~",
+        "~",
+        "~",
+        "~",
+        "~",
+        "~",
+        "~",
+        "~",
+        "~",
+        "~",
+        "~",
+        "~",
+        "~",
+        "                                1,5           All",
+    ],
+)
+
+
+@pytest.mark.vim
+def test_vim(cli_invoke: CliInvoke) -> None:
+    # The expected screens come from the vim pinned by the nix devshell (`nix develop` at the repo root)
+    vim_path = os.environ["HTTY_TEST_VIM_TARGET"]
+
+    args = [
         "--snapshot",
         *("-k", "ihello,Escape"),
         "--snapshot",
@@ -173,115 +234,44 @@ def test_vim() -> None:
         vim_path,
     ]
 
-    ran = subprocess.run(cmd, capture_output=True, text=True, check=True, env=env)
+    ran = cli_invoke(args, check=True)
 
     snapshots = ran.stdout.split("----\n")
     snapshots = [s for s in snapshots if s.strip()]
     assert len(snapshots) == 2, f"Expected 2 snapshots, got {len(snapshots)}"
 
     # Test first snapshot (vim opening screen)
-    assert terminal_contents(
-        actual_snapshots=snapshots[0],
-        expected_patterns=[
-            Pattern(
-                lines=[
-                    "",
-                    "~",
-                    "~",
-                    "~",
-                    "~               VIM - Vi IMproved",
-                    "~",
-                    "~                version 9.1.1336",
-                    "~            by Bram Moolenaar et al.",
-                    "~  Vim is open source and freely distributable",
-                    "~",
-                    re.compile(r"~.*"),  # Variable vim message line 1
-                    re.compile(r"~.*"),  # Variable vim message line 2
-                    "~",
-                    "~ type  :q<Enter>               to exit",
-                    "~ type  :help<Enter>  or  <F1>  for on-line help",
-                    "~ type  :help version9<Enter>   for version info",
-                    "~",
-                    "~",
-                    "~",
-                    "                                0,0-1         All",
-                ],
-            ),
-        ],
-    )
+    assert terminal_contents(actual_snapshots=snapshots[0], expected_patterns=[VIM_STARTUP_SCREEN])
 
     # Test second snapshot (after typing hello and pressing Escape)
+    assert terminal_contents(actual_snapshots=snapshots[1], expected_patterns=[VIM_AFTER_HELLO_SCREEN])
+
+
+def test_empty_line_preservation(cli_invoke: CliInvoke, leading_empty_line_script: str):
+    """Test that CLI preserves empty lines at the beginning of output."""
+    args = [
+        "--snapshot",
+        "--",
+        sys.executable,
+        leading_empty_line_script,
+    ]
+
+    result = cli_invoke(args, check=True)
+
+    # Parse the snapshot using the same logic as other tests
+    snapshots = result.stdout.split("----\n")
+    snapshots = [s for s in snapshots if s.strip()]
+    assert len(snapshots) == 1, f"Expected 1 snapshot, got {len(snapshots)}"
+
+    # Verify using terminal_contents function
     assert terminal_contents(
-        actual_snapshots=snapshots[1],
+        actual_snapshots=snapshots[0],
         expected_patterns=[
             Pattern(
                 lines=[
-                    "hello",
-                    "~",
-                    "~",
-                    "~",
-                    "~",
-                    "~",
-                    "~",
-                    "~",
-                    "~",
-                    "~",
-                    "~",
-                    "~",
-                    "~",
-                    "~",
-                    "~",
-                    "~",
-                    "~",
-                    "~",
-                    "~",
-                    "                                1,5           All",
-                ],
+                    "",  # Empty first line
+                    "hello",  # Second line with content
+                ]
             ),
         ],
     )
-
-
-def test_empty_line_preservation():
-    """Test that CLI preserves empty lines at the beginning of output."""
-    import os
-    import tempfile
-
-    # Create a script that outputs an empty line followed by "hello"
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".py", delete=False) as f:
-        f.write("print()  # Empty line\n")
-        f.write('print("hello")\n')
-        script_path = f.name
-
-    try:
-        cmd = [
-            *(sys.executable, "-m"),
-            "htty.cli",
-            "--snapshot",
-            "--",
-            sys.executable,
-            script_path,
-        ]
-
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True, env=env)
-
-        # Parse the snapshot using the same logic as other tests
-        snapshots = result.stdout.split("----\n")
-        snapshots = [s for s in snapshots if s.strip()]
-        assert len(snapshots) == 1, f"Expected 1 snapshot, got {len(snapshots)}"
-
-        # Verify using terminal_contents function
-        assert terminal_contents(
-            actual_snapshots=snapshots[0],
-            expected_patterns=[
-                Pattern(
-                    lines=[
-                        "",  # Empty first line
-                        "hello",  # Second line with content
-                    ]
-                ),
-            ],
-        )
-
-    finally:
-        os.unlink(script_path)
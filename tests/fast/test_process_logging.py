@@ -3,43 +3,174 @@ Test process termination logging to ensure correct messages appear.
 """
 
 import logging
+import os
+import subprocess
 import sys
 import tempfile
-from io import StringIO
+import time
 from textwrap import dedent
-from typing import Any, Callable, Tuple
+from typing import Callable, Generator, List, Optional
+
+import pytest
 
 from htty import ht_process, run
+from htty.ht import SubprocessController
+
+# A single interpreter that forks a fresh child per request, so the signal tests
+# don't each pay for Python startup. Children install their signal handlers before
+# reporting their PID, so a test can signal them as soon as it has the PID.
+SIGNAL_HARNESS_SCRIPT = dedent("""
+    import os
+    import signal
+    import sys
+    import time
+
+    BEHAVIORS = {
+        "ignore-sigterm": signal.SIG_IGN,
+    }
+
+    # Let the kernel reap exited children so their PIDs disappear right away
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+
+    harness_pid = os.getpid()
+    for line in sys.stdin:
+        behavior = line.strip()
+        if os.fork() == 0:
+            signal.signal(signal.SIGTERM, BEHAVIORS[behavior])
+            print(os.getpid(), flush=True)
+            # Exit if the harness goes away so no child outlives the test module
+            while os.getppid() == harness_pid:
+                time.sleep(0.1)
+            os._exit(0)
+""")
+
+
+class SignalHarness:
+    """Handle on the shared harness process, used to fork children with a given SIGTERM behavior."""
+
+    def __init__(self, proc: "subprocess.Popen[str]") -> None:
+        self.proc = proc
+
+    def spawn(self, behavior: str) -> int:
+        """Fork a child that handles SIGTERM according to `behavior` and return its PID."""
+        assert self.proc.stdin is not None and self.proc.stdout is not None
+        self.proc.stdin.write(behavior + "\n")
+        self.proc.stdin.flush()
+        return int(self.proc.stdout.readline())
+
+
+@pytest.fixture(scope="module")
+def signal_harness() -> Generator[SignalHarness, None, None]:
+    proc = subprocess.Popen(
+        [sys.executable, "-c", SIGNAL_HARNESS_SCRIPT],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    yield SignalHarness(proc)
+    assert proc.stdin is not None
+    proc.stdin.close()
+    proc.wait(timeout=5)
+
+
+class _ListHandler(logging.Handler):
+    """Logging handler that keeps every record it receives."""
+
+    def __init__(self) -> None:
+        super().__init__(level=logging.DEBUG)
+        self.records: List[logging.LogRecord] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(record)
+
+
+class DebugLogCapture:
+    """Context manager that captures debug logs from htty.ht."""
+
+    def __init__(self) -> None:
+        self.handler = _ListHandler()
+        self.logger = logging.getLogger("htty.ht")
+        self._original_level: Optional[int] = None
+
+    def __enter__(self) -> "DebugLogCapture":
+        self._original_level = self.logger.level
+        self.logger.setLevel(logging.DEBUG)
+        self.logger.addHandler(self.handler)
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.logger.removeHandler(self.handler)
+        if self._original_level is not None:
+            self.logger.setLevel(self._original_level)
+
+    @property
+    def records(self) -> List[logging.LogRecord]:
+        return self.handler.records
+
+    @property
+    def text(self) -> str:
+        return "\n".join(record.getMessage() for record in self.records)
+
+
+@pytest.fixture(scope="module")
+def debug_logs() -> Generator[DebugLogCapture, None, None]:
+    with DebugLogCapture() as capture:
+        yield capture
+
+
+class SignalProbe:
+    """A harness child driven through htty's SubprocessController, along with the logs it produced."""
+
+    def __init__(self, pid: int, capture: DebugLogCapture) -> None:
+        self.controller = SubprocessController(pid)
+        self.capture = capture
+
+    def send_sigterm(self) -> None:
+        self.controller.terminate()
 
+    def send_sigkill(self) -> None:
+        self.controller.kill()
 
-def capture_debug_logs(func: Callable[[], Any]) -> Tuple[Any, str]:
-    """Decorator to capture debug logs from a function."""
-    # Create a string buffer to capture logs
-    log_capture = StringIO()
+    def wait(self) -> Optional[int]:
+        return self.controller.wait()
 
-    # Create a handler that writes to our buffer
-    handler = logging.StreamHandler(log_capture)
-    handler.setLevel(logging.DEBUG)
+    @property
+    def logs(self) -> str:
+        return self.capture.text
 
-    # Get the htty logger and add our handler
-    logger = logging.getLogger("htty.ht")
-    original_level = logger.level
-    logger.setLevel(logging.DEBUG)
-    logger.addHandler(handler)
 
+def _pid_exists(pid: int) -> bool:
+    """Whether a process with this PID is still around (signal 0 only checks)."""
     try:
-        # Run the function
-        result = func()
+        os.kill(pid, 0)
+    except OSError:
+        return False
+    return True
 
-        # Get the captured logs
-        logs = log_capture.getvalue()
 
-        return result, logs
-    finally:
-        # Clean up
-        logger.removeHandler(handler)
-        logger.setLevel(original_level)
-        handler.close()
+def _wait_for(predicate: Callable[[], bool], timeout_s: float = 2.0, interval_s: float = 0.005) -> None:
+    """
+    Wait until `predicate` returns true, checking every `interval_s`.
+
+    Raises TimeoutError if it is still false after `timeout_s`.
+    """
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if predicate():
+            return
+        time.sleep(interval_s)
+    raise TimeoutError(f"Condition not met within {timeout_s}s")
+
+
+@pytest.fixture
+def htty_signal_probe(signal_harness: SignalHarness, debug_logs: DebugLogCapture) -> Callable[[str], SignalProbe]:
+    """Factory for probes around harness children; logs from earlier tests in the module are dropped."""
+    debug_logs.records.clear()
+
+    def make_probe(behavior: str) -> SignalProbe:
+        return SignalProbe(signal_harness.spawn(behavior), debug_logs)
+
+    return make_probe
 
 
 def test_python_script_natural_exit() -> None:
@@ -56,8 +187,7 @@ def test_python_script_natural_exit() -> None:
         script_path = f.name
 
     try:
-
-        def run_test() -> str:
+        with DebugLogCapture() as capture:
             cmd = f"{sys.executable} {script_path}"
             proc = run(cmd, rows=10, cols=40)
 
@@ -65,17 +195,12 @@ def test_python_script_natural_exit() -> None:
             proc.subprocess_controller.wait()
             proc.exit()
 
-            return "test completed"
-
-        _, logs = capture_debug_logs(run_test)
-
+        logs = capture.text
         # Check that the logs contain the "exited on its own" message
         assert "has exited on its own" in logs, f"Expected 'exited on its own' in logs: {logs}"
         # Check that it does NOT contain the "after termination signal" message
         assert "after termination signal" not in logs, f"Unexpected 'after termination signal' in logs: {logs}"
     finally:
-        import os
-
         os.unlink(script_path)
 
 
@@ -100,51 +225,35 @@ def test_python_script_context_manager_forced_exit() -> None:
         script_path = f.name
 
     try:
-
-        def run_test() -> str:
+        with DebugLogCapture() as capture:
             cmd = f"{sys.executable} {script_path}"
-            with ht_process(cmd, rows=10, cols=40) as _:
-                # Give the script time to start
-                import time
-
-                time.sleep(0.2)
+            with ht_process(cmd, rows=10, cols=40) as proc:
+                # Wait for the script to report that it started
+                _wait_for(lambda: any("started" in event["data"]["seq"] for event in proc.get_output()))
                 # Context manager will terminate subprocess on exit
 
-            return "test completed"
-
-        _, logs = capture_debug_logs(run_test)
-
+        logs = capture.text
         # Check that the logs contain the "after termination signal" message
         assert "after termination signal" in logs, f"Expected 'after termination signal' in logs: {logs}"
         # Check that it does NOT contain the "exited on its own" message
         assert "exited on its own" not in logs, f"Unexpected 'exited on its own' in logs: {logs}"
     finally:
-        import os
-
         os.unlink(script_path)
 
 
 def test_python_script_sigterm_responsive() -> None:
     """Test that explicitly calling terminate() on a SIGTERM-responsive script shows correct message."""
-    # Create a Python script that responds to SIGTERM gracefully
+    # Runs under ht, so its exit code comes from ht's exitCode event rather than a guess
     script_content = dedent("""
         import signal
-        import time
         import sys
+        import time
 
-        def signal_handler(signum, frame):
-            print(f"Received signal {signum}, exiting gracefully...")
-            sys.exit(0)
-
-        signal.signal(signal.SIGTERM, signal_handler)
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
 
         print("Python script started, waiting for signal...")
-        try:
-            while True:
-                time.sleep(0.1)
-        except KeyboardInterrupt:
-            print("Received interrupt, exiting...")
-            sys.exit(0)
+        while True:
+            time.sleep(0.1)
     """)
 
     with tempfile.NamedTemporaryFile(mode="w", suffix=".py", delete=False) as f:
@@ -152,113 +261,72 @@ def test_python_script_sigterm_responsive() -> None:
         script_path = f.name
 
     try:
-
-        def run_test() -> str:
-            cmd = f"{sys.executable} {script_path}"
+        with DebugLogCapture() as capture:
+            # ht runs the command through `sh -c`; exec so that SIGTERM reaches the script, not the shell
+            cmd = f"exec {sys.executable} {script_path}"
             proc = run(cmd, rows=10, cols=40)
-
-            # Give the script time to start
-            import time
-
-            time.sleep(0.2)
-
-            # Explicitly terminate the subprocess
-            proc.subprocess_controller.terminate()
-            proc.subprocess_controller.wait()
-            proc.exit()
-
-            return "test completed"
-
-        _, logs = capture_debug_logs(run_test)
-
+            try:
+                # The handler is installed before the script reports that it started
+                _wait_for(lambda: any("started" in event["data"]["seq"] for event in proc.get_output()))
+
+                # Explicitly terminate the subprocess
+                proc.subprocess_controller.terminate()
+                # ht reports the exit code once it has reaped the script
+                _wait_for(lambda: proc.subprocess_controller.exit_code is not None)
+                exit_code = proc.subprocess_controller.wait()
+            finally:
+                proc.exit()
+
+        logs = capture.text
+        assert exit_code == 0, f"Expected the script's own exit code 0, got {exit_code}: {logs}"
         # Should see both the SIGTERM message and the "after termination signal" message
         assert "Sending SIGTERM" in logs, f"Expected 'Sending SIGTERM' in logs: {logs}"
         assert "after termination signal" in logs, f"Expected 'after termination signal' in logs: {logs}"
-        # Should NOT see "exited on its own"
+        # Should NOT see "exited on its own", or have had to assume an exit code
         assert "exited on its own" not in logs, f"Unexpected 'exited on its own' in logs: {logs}"
+        assert "Could not determine exit code" not in logs, f"Unexpected exit code fallback in logs: {logs}"
     finally:
-        import os
-
         os.unlink(script_path)
 
 
-def test_python_script_sigterm_ignore_needs_sigkill() -> None:
+def test_python_script_sigterm_ignore_needs_sigkill(htty_signal_probe: Callable[[str], SignalProbe]) -> None:
     """Test that a script ignoring SIGTERM requires SIGKILL and shows correct messages."""
-    # Create a Python script that ignores SIGTERM and requires SIGKILL
-    script_content = dedent("""
-        import signal
-        import time
-        import sys
-
-        def ignore_signal(signum, frame):
-            print(f"Ignoring signal {signum}, continuing...")
-
-        # Ignore SIGTERM
-        signal.signal(signal.SIGTERM, ignore_signal)
-
-        print("Python script started, ignoring SIGTERM...")
-        try:
-            while True:
-                time.sleep(0.1)
-        except KeyboardInterrupt:
-            print("Received interrupt, exiting...")
-            sys.exit(0)
-    """)
-
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".py", delete=False) as f:
-        f.write(script_content)
-        script_path = f.name
-
-    try:
-
-        def run_test() -> str:
-            cmd = f"{sys.executable} {script_path}"
-            proc = run(cmd, rows=10, cols=40)
-
-            # Give the script time to start
-            import time
-
-            time.sleep(0.2)
-
-            # Try terminate first (should be ignored)
-            proc.subprocess_controller.terminate()
-            time.sleep(0.5)  # Give it time to ignore the signal
-
-            # Now force kill it
-            proc.subprocess_controller.kill()
-            proc.subprocess_controller.wait()
-            proc.exit()
-
-            return "test completed"
-
-        _, logs = capture_debug_logs(run_test)
-
-        # Should see both SIGTERM and SIGKILL messages
-        assert "Sending SIGTERM" in logs, f"Expected 'Sending SIGTERM' in logs: {logs}"
-        assert "Sending SIGKILL" in logs, f"Expected 'Sending SIGKILL' in logs: {logs}"
-        assert "after termination signal" in logs, f"Expected 'after termination signal' in logs: {logs}"
-        # Should NOT see "exited on its own"
-        assert "exited on its own" not in logs, f"Unexpected 'exited on its own' in logs: {logs}"
-    finally:
-        import os
-
-        os.unlink(script_path)
+    probe = htty_signal_probe("ignore-sigterm")
+
+    # Try terminate first (should be ignored)
+    probe.send_sigterm()
+
+    # Force kill it only once the grace period shows the signal was ignored
+    pid = probe.controller.pid
+    assert pid is not None
+    with pytest.raises(TimeoutError):
+        _wait_for(lambda: not _pid_exists(pid), timeout_s=0.5, interval_s=0.01)
+    probe.send_sigkill()
+    exit_code = probe.wait()
+
+    logs = probe.logs
+    # Harness children aren't children of this process, so htty can't waitpid() them and assumes
+    # the SIGKILL exit code; the SIGTERM test above covers exit codes reported by ht
+    assert exit_code == 137, f"Expected the SIGKILL exit code 137, got {exit_code}: {logs}"
+    assert "assuming exit code 137" in logs, f"Expected the exit code fallback in logs: {logs}"
+    # Should see both SIGTERM and SIGKILL messages
+    assert "Sending SIGTERM" in logs, f"Expected 'Sending SIGTERM' in logs: {logs}"
+    assert "Sending SIGKILL" in logs, f"Expected 'Sending SIGKILL' in logs: {logs}"
+    assert "after termination signal" in logs, f"Expected 'after termination signal' in logs: {logs}"
+    # Should NOT see "exited on its own"
+    assert "exited on its own" not in logs, f"Unexpected 'exited on its own' in logs: {logs}"
 
 
 def test_natural_exit_shows_correct_message() -> None:
     """Test that a process finishing naturally shows the correct message."""
-
-    def run_test() -> str:
+    with DebugLogCapture() as capture:
         proc = run("echo hello", rows=5, cols=20)
 
         # Wait for the process to finish naturally
         proc.subprocess_controller.wait()
         proc.exit()
 
-        return "test completed"
-
-    _, logs = capture_debug_logs(run_test)
-
+    logs = capture.text
     # Should see "exited on its own" message
     assert "exited on its own" in logs, f"Expected 'exited on its own' in logs: {logs}"
     # Should NOT see "after termination signal"
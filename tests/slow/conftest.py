@@ -0,0 +1,32 @@
+"""Shared pytest configuration for the release tests."""
+
+from typing import List
+
+import pytest
+
+
+# Run before xdist's own hook, which appends each test's group to its node ID so the scheduler can see it
+@pytest.hookimpl(tryfirst=True)
+def pytest_collection_modifyitems(config: pytest.Config, items: List[pytest.Item]) -> None:
+    """
+    Narrow the release tests to the Python versions given with `--htty-python`, and keep tests for the
+    same Python version on the same xdist worker (use with `--dist loadgroup`).
+    """
+    selected_versions = config.getoption("--htty-python")
+    use_xdist_groups = config.pluginmanager.hasplugin("xdist")
+
+    kept, deselected = [], []
+    for item in items:
+        callspec = getattr(item, "callspec", None)
+        python_version = callspec.params.get("python_env") if callspec else None
+        if python_version is not None:
+            if selected_versions and python_version not in selected_versions:
+                deselected.append(item)
+                continue
+            if use_xdist_groups:
+                item.add_marker(pytest.mark.xdist_group(name=f"py{python_version}"))
+        kept.append(item)
+
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = kept
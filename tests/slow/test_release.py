@@ -1,31 +1,85 @@
 """
 Release tests for htty using Python's virtualenv.
-Run pytest with `-s` to see print output.
+Run pytest with `--log-cli-level=DEBUG` to see the setup log as it happens.
+Run pytest with `-n auto --dist loadgroup` to spread the Python versions across CPUs.
+Run pytest with `--htty-python 3.12` (repeatable) to only test against some Python versions.
 """
 
+import hashlib
+import logging
 import os
 import shutil
 import subprocess
 import tempfile
+import weakref
 import zipfile
 from pathlib import Path
 from textwrap import dedent
-from typing import Tuple
+from typing import Dict, List, Optional, Tuple
 
 import pytest
 
+logger = logging.getLogger(__name__)
+
 PYTHON_VERSIONS = ["3.10", "3.11", "3.12"]
 
+# Installed virtualenvs are cached here, keyed by Python version, the interpreter behind it and wheel contents
+VENV_CACHE_DIR = Path(os.environ.get("HTTY_TEST_CACHE_DIR", Path.home() / ".cache" / "htty-test"))
+
+# Virtualenv layout for this platform
+_BIN_SUBDIR = "Scripts" if os.name == "nt" else "bin"
+_EXE_SUFFIX = ".exe" if os.name == "nt" else ""
+
+# Prints a small number triangle; run in place by the terminal size test
+NUMBER_TRIANGLE_SCRIPT = Path(__file__).parent / "number_triangle.py"
+
+
+def _link_or_copy(source: str, destination: str) -> None:
+    """Hardlink a file, falling back to a copy when source and destination are on different filesystems."""
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+
+def _clone_venv(source_dir: Path, destination_dir: Path, location: Optional[Path] = None) -> None:
+    """
+    Copy a virtualenv (hardlinking where possible) and repoint its scripts and config.
+
+    The copy is repointed at `location`, which defaults to `destination_dir`; pass the final path
+    when the copy will be renamed into place afterwards.
+    """
+    shutil.copytree(source_dir, destination_dir, symlinks=True, copy_function=_link_or_copy, dirs_exist_ok=True)
+
+    old_path, new_path = str(source_dir).encode(), str(location or destination_dir).encode()
+    bin_dir = destination_dir / _BIN_SUBDIR
+    for path in [destination_dir / "pyvenv.cfg", *bin_dir.iterdir()]:
+        if path.is_symlink() or not path.is_file():
+            continue
+        content = path.read_bytes()
+        if old_path in content:
+            mode = path.stat().st_mode
+            # Replace rather than edit in place, so the hardlinked original is left alone
+            path.unlink()
+            path.write_bytes(content.replace(old_path, new_path))
+            path.chmod(mode)
+
 
 class PythonEnvironment:
     """Environment for testing htty wheel installations across Python versions."""
 
+    # Console scripts the htty wheel is expected to install
+    _SCRIPT_NAMES = ("htty", "htty-ht")
+
     def __init__(self, python_version: str, workspace_root: Path, htty_wheel: Path):
         self.python_version = python_version
         self.workspace_root = workspace_root
         self.htty_wheel = htty_wheel
         self.setup_complete = False
+        self._tmp: Optional[tempfile.TemporaryDirectory] = None
         self.venv_dir = None
+        self._bin_dir = None
+        self._env = None
         self.python_executable = None
 
     def setup(self):
@@ -33,30 +87,57 @@ class PythonEnvironment:
         if self.setup_complete:
             return
 
-        print(f"🐍 Setting up wheel test environment for Python {self.python_version}")
+        logger.debug(f"🐍 Setting up wheel test environment for Python {self.python_version}")
 
         # Create a temporary directory for the virtualenv
-        self.venv_dir = Path(tempfile.mkdtemp(prefix=f"htty-wheel-test-py{self.python_version}-"))
+        # The directory is removed by cleanup(), or when this object is collected if setup dies partway
+        self._tmp = tempfile.TemporaryDirectory(
+            prefix=f"htty-wheel-test-py{self.python_version}-", ignore_cleanup_errors=True
+        )
+        weakref.finalize(self, self._tmp.cleanup)
+        self.venv_dir = Path(self._tmp.name)
+
+        # Set up Python executable path for the virtualenv
+        self._bin_dir = self.venv_dir / _BIN_SUBDIR
+        self.python_executable = self._script_path("python")
+
+        # Reuse a virtualenv that earlier sessions already installed this exact wheel into,
+        # with this exact interpreter (a cached pyvenv.cfg points at the interpreter's home)
+        template_dir = self._template_dir(self._interpreter_identity())
+        if template_dir.is_dir():
+            logger.debug(f"♻️  Cloning cached virtualenv from: {template_dir}")
+            _clone_venv(template_dir, self.venv_dir)
+            self._check_scripts()
+        else:
+            self._create_and_install()
+            self._save_template(template_dir)
+
+        # Environment for commands run in the virtualenv, computed once and shared by every run_command
+        env = os.environ.copy()
+        env["PATH"] = f"{self._bin_dir}{os.pathsep}{env.get('PATH', '')}"
+        env["VIRTUAL_ENV"] = str(self.venv_dir)
+        # Remove any PYTHONHOME that might interfere
+        env.pop("PYTHONHOME", None)
+        self._env = env
+
+        logger.debug(f"✅ Wheel test environment ready for Python {self.python_version}")
+        self.setup_complete = True
 
-        # Create virtualenv using the specified Python version
+    def _create_and_install(self):
+        """Create a fresh virtualenv and install the htty wheel into it, using uv when it's available."""
+        # Create virtualenv using the specified Python version (setup() already checked it is available)
         python_bin = f"python{self.python_version}"
-        print(f"📦 Creating virtualenv with {python_bin}")
+        uv = shutil.which("uv")
+        logger.debug(f"📦 Creating virtualenv with {python_bin}")
 
         try:
-            # Verify Python version is available
-            result = subprocess.run(
-                [python_bin, "--version"],
-                capture_output=True,
-                text=True,
-                timeout=30,
-            )
-            if result.returncode != 0:
-                raise RuntimeError(f"Python {self.python_version} not available: {result.stderr}")
-            print(f"✅ Using Python: {result.stdout.strip()}")
-
             # Create virtualenv
+            if uv:
+                venv_cmd = [uv, "venv", "--quiet", "--python", python_bin, str(self.venv_dir)]
+            else:
+                venv_cmd = [python_bin, "-m", "venv", str(self.venv_dir)]
             venv_result = subprocess.run(
-                [python_bin, "-m", "venv", str(self.venv_dir)],
+                venv_cmd,
                 capture_output=True,
                 text=True,
                 timeout=60,
@@ -64,19 +145,12 @@ class PythonEnvironment:
             if venv_result.returncode != 0:
                 raise RuntimeError(f"Failed to create virtualenv: {venv_result.stderr}")
 
-            # Set up Python executable path for the virtualenv
-            if os.name == "nt":  # Windows
-                self.python_executable = self.venv_dir / "Scripts" / "python.exe"
-            else:  # Unix-like
-                self.python_executable = self.venv_dir / "bin" / "python"
-
             if not self.python_executable.exists():
                 raise RuntimeError(f"Virtualenv Python executable not found: {self.python_executable}")
 
-            print(f"✅ Virtualenv created at: {self.venv_dir}")
+            logger.debug(f"✅ Virtualenv created at: {self.venv_dir}")
 
-            # Verify console scripts are NOT available before installation
-            self._verify_console_scripts_not_present()
+            # No need to check that the console scripts are absent: the virtualenv was just created empty
 
             # Look for pre-downloaded wheels in the Nix environment
             wheels_dir = None
@@ -87,142 +161,169 @@ class PythonEnvironment:
                 cache_path = Path(wheel_cache_dir)
                 wheels_dir = cache_path / "wheels"
                 if not wheels_dir.exists():
-                    print(f"⚠️  WHEEL_CACHE_DIR set to {wheel_cache_dir} but wheels directory not found")
+                    logger.warning(f"⚠️  WHEEL_CACHE_DIR set to {wheel_cache_dir} but wheels directory not found")
                     wheels_dir = None
 
             # Install the htty wheel - this is what we're actually testing!
-            print(f"🎯 Installing htty wheel: {self.htty_wheel}")
+            logger.debug(f"🎯 Installing htty wheel: {self.htty_wheel}")
 
-            install_cmd = [str(self.python_executable), "-m", "pip", "install", str(self.htty_wheel)]
+            if uv:
+                # uv doesn't compile bytecode or check for its own updates unless asked to
+                install_cmd = [uv, "pip", "install", "--python", str(self.python_executable), str(self.htty_wheel)]
+            else:
+                # Skip pip's self-update check and eager bytecode compilation (it happens lazily on first import)
+                install_cmd = [
+                    str(self.python_executable),
+                    "-m",
+                    "pip",
+                    "install",
+                    "--disable-pip-version-check",
+                    "--no-compile",
+                    str(self.htty_wheel),
+                ]
 
             # If we found pre-downloaded wheels, use them
             if wheels_dir and wheels_dir.exists():
-                print(f"📦 Using pre-downloaded wheels from: {wheels_dir}")
-                install_cmd.extend(["--find-links", str(wheels_dir), "--no-index"])
+                logger.debug(f"📦 Using pre-downloaded wheels from: {wheels_dir}")
+                if uv:
+                    install_cmd.extend(["--find-links", str(wheels_dir), "--offline"])
+                else:
+                    install_cmd.extend(["--find-links", str(wheels_dir), "--no-index", "--no-build-isolation"])
             else:
-                print("⚠️  No pre-downloaded wheels found, will try to download dependencies")
+                logger.warning("⚠️  No pre-downloaded wheels found, will try to download dependencies")
 
             install_result = subprocess.run(
                 install_cmd,
                 capture_output=True,
                 text=True,
+                env={**os.environ, "PIP_NO_INPUT": "1", "PIP_DISABLE_PIP_VERSION_CHECK": "1"},
                 timeout=300,
             )
             if install_result.returncode != 0:
                 raise RuntimeError(f"Failed to install htty wheel: {install_result.stderr}")
 
-            print("✅ htty wheel installed successfully")
-            if install_result.stdout:
-                print(f"📦 Installation output: {install_result.stdout}")
+            logger.debug("✅ htty wheel installed successfully")
+            if install_result.stdout and logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"📦 Installation output: {install_result.stdout}")
 
             # Verify console scripts ARE available after installation
-            self._verify_console_scripts_present()
+            self._check_scripts()
 
         except FileNotFoundError:
             raise RuntimeError(f"Python {self.python_version} not found in PATH")
 
-        print(f"✅ Wheel test environment ready for Python {self.python_version}")
-        self.setup_complete = True
+    def _interpreter_identity(self) -> str:
+        """The target interpreter's sys.executable and sys.version, which also checks that it is available."""
+        python_bin = f"python{self.python_version}"
+        try:
+            result = subprocess.run(
+                [python_bin, "-c", "import sys; print(sys.executable); print(sys.version)"],
+                capture_output=True,
+                text=True,
+                timeout=30,
+            )
+        except FileNotFoundError:
+            raise RuntimeError(f"Python {self.python_version} not found in PATH")
+        if result.returncode != 0:
+            raise RuntimeError(f"Python {self.python_version} not available: {result.stderr}")
+        logger.debug(f"✅ Using Python: {result.stdout.strip()}")
+        return result.stdout
+
+    def _template_dir(self, interpreter_identity: str) -> Path:
+        """Location of the cached virtualenv for this interpreter and wheel."""
+        digest = hashlib.sha256(self.htty_wheel.read_bytes())
+        digest.update(interpreter_identity.encode())
+        return VENV_CACHE_DIR / f"template-py{self.python_version}-{digest.hexdigest()[:16]}"
+
+    def _save_template(self, template_dir: Path):
+        """Cache the freshly installed virtualenv so later sessions can clone it instead of reinstalling."""
+        staging_dir = template_dir.with_name(f"{template_dir.name}.tmp-{os.getpid()}")
+        try:
+            template_dir.parent.mkdir(parents=True, exist_ok=True)
+            _clone_venv(self.venv_dir, staging_dir, location=template_dir)
+            staging_dir.rename(template_dir)
+            logger.debug(f"💾 Cached virtualenv at: {template_dir}")
+        except OSError as e:
+            logger.warning(f"⚠️  Could not cache virtualenv at {template_dir}: {e}")
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            return
 
-    def _verify_console_scripts_not_present(self):
-        """Verify that htty and htty-ht console scripts are NOT available in the virtualenv before installation."""
-        print("🔍 Verifying console scripts are not present in virtualenv before installation...")
-
-        # Check directly in the virtualenv bin directory, not the system PATH
-        if os.name == "nt":  # Windows
-            venv_bin_dir = self.venv_dir / "Scripts"
-            htty_path = venv_bin_dir / "htty.exe"
-            htty_ht_path = venv_bin_dir / "htty-ht.exe"
-        else:  # Unix-like
-            venv_bin_dir = self.venv_dir / "bin"
-            htty_path = venv_bin_dir / "htty"
-            htty_ht_path = venv_bin_dir / "htty-ht"
-
-        # Check that htty is not in the virtualenv
-        if htty_path.exists():
-            raise RuntimeError(f"htty script unexpectedly found in virtualenv before installation: {htty_path}")
-
-        # Check that htty-ht is not in the virtualenv
-        if htty_ht_path.exists():
-            raise RuntimeError(f"htty-ht script unexpectedly found in virtualenv before installation: {htty_ht_path}")
-
-        print("✅ Console scripts correctly not present in virtualenv before installation")
-
-    def _verify_console_scripts_present(self):
-        """Verify that htty and htty-ht console scripts ARE available in the virtualenv after installation."""
-        print("🔍 Verifying console scripts are present in virtualenv after installation...")
-
-        # Check directly in the virtualenv bin directory
-        if os.name == "nt":  # Windows
-            venv_bin_dir = self.venv_dir / "Scripts"
-            htty_path = venv_bin_dir / "htty.exe"
-            htty_ht_path = venv_bin_dir / "htty-ht.exe"
-        else:  # Unix-like
-            venv_bin_dir = self.venv_dir / "bin"
-            htty_path = venv_bin_dir / "htty"
-            htty_ht_path = venv_bin_dir / "htty-ht"
-
-        # Check that htty is in the virtualenv
-        if not htty_path.exists():
-            raise RuntimeError(f"htty script not found in virtualenv after installation: {htty_path}")
-        print(f"✅ htty found at: {htty_path}")
-
-        # Check that htty-ht is in the virtualenv
-        if not htty_ht_path.exists():
-            raise RuntimeError(f"htty-ht script not found in virtualenv after installation: {htty_ht_path}")
-        print(f"✅ htty-ht found at: {htty_ht_path}")
-
-        print("✅ Console scripts correctly present in virtualenv after installation")
-
-    def run_command(self, command: str) -> Tuple[int, str]:
-        """Run a command in the virtualenv where htty wheel is installed."""
-        if not self.setup_complete:
-            self.setup()
+        # Drop templates left behind by older wheels or interpreters for this Python version,
+        # leaving other sessions' in-progress staging directories alone
+        for stale_dir in template_dir.parent.glob(f"template-py{self.python_version}-*"):
+            if stale_dir != template_dir and ".tmp-" not in stale_dir.name:
+                logger.debug(f"🧹 Removing stale cached virtualenv: {stale_dir}")
+                shutil.rmtree(stale_dir, ignore_errors=True)
 
-        print(f"💻 Executing in virtualenv: {command}")
+    def _script_path(self, name: str) -> Path:
+        """Path of an executable in the virtualenv's bin directory."""
+        return self._bin_dir / f"{name}{_EXE_SUFFIX}"
 
-        try:
-            # Run command in the virtualenv
-            # We need to activate the virtualenv environment variables
-            env = os.environ.copy()
+    def _check_scripts(self):
+        """Verify that the htty console scripts are installed in the virtualenv."""
+        logger.debug("🔍 Verifying console scripts are present in virtualenv...")
 
-            # Set virtualenv paths
-            if os.name == "nt":  # Windows
-                env["PATH"] = f"{self.venv_dir / 'Scripts'}{os.pathsep}{env.get('PATH', '')}"
-            else:  # Unix-like
-                env["PATH"] = f"{self.venv_dir / 'bin'}{os.pathsep}{env.get('PATH', '')}"
+        # Check directly in the virtualenv bin directory, not the system PATH, listing it once
+        with os.scandir(self._bin_dir) as entries:
+            bin_entries = {entry.name: entry.path for entry in entries}
 
-            env["VIRTUAL_ENV"] = str(self.venv_dir)
+        for name in self._SCRIPT_NAMES:
+            path = bin_entries.get(self._script_path(name).name)
+            # An installed script only counts if it can actually be executed
+            if path is None or not os.access(path, os.X_OK):
+                raise RuntimeError(f"{name} script not found in virtualenv: {self._script_path(name)}")
 
-            # Remove any PYTHONHOME that might interfere
-            env.pop("PYTHONHOME", None)
+        logger.debug("✅ Console scripts correctly present in virtualenv")
 
-            result = subprocess.run(
-                command,
-                shell=True,
+    def run_command(self, argv: List[str]) -> Tuple[int, str]:
+        """Run a command in the virtualenv where htty wheel is installed.
+
+        The command is given as an argv list and executed directly (no shell),
+        with `argv[0]` resolved against the virtualenv's bin directory first.
+        """
+        if not self.setup_complete:
+            self.setup()
+        assert self.venv_dir is not None
+
+        logger.debug(f"💻 Executing in virtualenv: {' '.join(argv)}")
+
+        try:
+            # Without a shell, PATH lookup for argv[0] happens against our own
+            # environment, so resolve it against the virtualenv explicitly
+            executable = shutil.which(argv[0], path=self._env["PATH"]) or argv[0]
+
+            # stderr is merged into stdout so there's a single pipe to drain and
+            # the two streams keep their relative order; decode once at the end
+            proc = subprocess.Popen(
+                [executable, *argv[1:]],
                 cwd=self.venv_dir,
-                capture_output=True,
-                text=True,
-                timeout=300,
-                env=env,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                bufsize=-1,
+                env=self._env,
             )
+            try:
+                stdout_bytes, _ = proc.communicate(timeout=300)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.communicate()
+                raise
+
+            output = stdout_bytes.decode("utf-8", errors="replace")
 
-            if result.stdout:
-                print("📤 STDOUT:")
-                print(result.stdout)
-            if result.stderr:
-                print("⚠️  STDERR:")
-                print(result.stderr)
+            # Only pay for dumping the output when someone is going to see it
+            if output and logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"📤 OUTPUT:\n{output}")
 
-            print(f"🏁 Command completed with exit code: {result.returncode}")
+            logger.debug(f"🏁 Command completed with exit code: {proc.returncode}")
 
-            return result.returncode, result.stdout + (result.stderr if result.stderr else "")
+            return proc.returncode, output
 
         except subprocess.TimeoutExpired:
-            print("⏰ Command timed out after 5 minutes")
+            logger.error("⏰ Command timed out after 5 minutes")
             return 1, "Command timed out after 5 minutes"
         except Exception as e:
-            print(f"❌ Error running command: {e}")
+            logger.error(f"❌ Error running command: {e}")
             return 1, f"Error running command: {e}"
 
     def run_command_with_script(self, python_code: str) -> Tuple[int, str]:
@@ -231,33 +332,20 @@ class PythonEnvironment:
             self.setup()
         assert self.venv_dir is not None
 
-        # Create a temporary Python file in the virtualenv directory
-        python_file = self.venv_dir / f"script_{hash(python_code) % 10000}.py"
-        python_file.write_text(python_code)
-        print("🐍 Executing Python script in virtualenv:")
-        print(f"    {python_code.strip()}")
+        # Create a Python file in the virtualenv directory, named by its content so repeat runs reuse it
+        python_file = self.venv_dir / f"script_{hashlib.blake2b(python_code.encode(), digest_size=8).hexdigest()}.py"
+        if not python_file.exists():
+            python_file.write_bytes(python_code.encode())
+        logger.debug(f"🐍 Executing Python script in virtualenv:\n    {python_code.strip()}")
 
         # Run the Python script using the virtualenv's Python
-        return self.run_command(f"python {python_file}")
+        return self.run_command([str(self.python_executable), str(python_file)])
 
     def cleanup(self):
         """Clean up the virtualenv directory."""
-        if self.venv_dir and self.venv_dir.exists():
-            shutil.rmtree(self.venv_dir, ignore_errors=True)
-            print(f"🧹 Cleaned up virtualenv for Python {self.python_version}")
-
-    def copy_file(self, source: Path, destination: str):
-        """Copy a file to the virtualenv working directory."""
-        if not self.setup_complete:
-            self.setup()
-        assert self.venv_dir is not None
-        print(f"💾 Copying file: {source} to {destination}")
-
-        # Copy the file to the virtualenv directory
-        destination_path = self.venv_dir / destination
-        shutil.copy(source, destination_path)
-
-        print(f"✅ File copied successfully: {destination_path}")
+        if self._tmp is not None:
+            self._tmp.cleanup()
+            logger.debug(f"🧹 Cleaned up virtualenv for Python {self.python_version}")
 
 
 @pytest.fixture(scope="session")
@@ -280,96 +368,134 @@ def htty_wheel():
     return wheel_file
 
 
-@pytest.fixture(scope="function")
+@pytest.fixture(scope="session", params=PYTHON_VERSIONS, ids=lambda version: f"py{version}")
 def python_env(request, workspace_root, htty_wheel):
-    """Create a Python environment for the current test's Python version."""
-    # Get the python_version from the current test's parameters
-    python_version = request.node.callspec.params["python_version"]
-
-    env = PythonEnvironment(python_version, workspace_root, htty_wheel)
-    env.setup()  # Set up for this specific test
+    """Create one Python environment per Python version, shared by every test in the session."""
+    env = PythonEnvironment(request.param, workspace_root, htty_wheel)
+    request.addfinalizer(env.cleanup)
+    env.setup()
+    return env
 
-    yield env
 
-    env.cleanup()
-
-
-@pytest.mark.parametrize("python_version", PYTHON_VERSIONS)
-class TestNixPython:
-    """Test htty functionality across Python versions using Python's virtualenv."""
+# Exercises the Python API in one interpreter; each scenario reports a `MARK:<name>:<result>` line
+# only if it succeeds, and the script exits nonzero if any of them raised
+API_TEST_SCRIPT = """
+import sys
+import time
+import traceback
+
+python_version = sys.argv[1]
+failed = False
+
+try:
+    import htty
+    print(f"MARK:import:{htty.__name__}")
+except Exception:
+    traceback.print_exc()
+    failed = True
+
+try:
+    from htty import ht_process
+    with ht_process(["echo", "test"], rows=10, cols=40) as proc:
+        snapshot = proc.snapshot()
+        print(f"Snapshot text length: {len(snapshot.text)}")
+        print(f"MARK:instance:rows={proc.rows},cols={proc.cols}")
+except Exception:
+    traceback.print_exc()
+    failed = True
+
+try:
+    from htty import run
+    proc = run(["echo", f"Hello from API Python {python_version}"], rows=5, cols=40)
+    # Poll until the command's output shows up rather than sleeping a fixed amount
+    deadline = time.monotonic() + 2.0
+    snapshot = proc.snapshot()
+    while not snapshot.text.strip() and time.monotonic() < deadline:
+        time.sleep(0.02)
+        snapshot = proc.snapshot()
+    print(f"Got snapshot with {len(snapshot.text)} chars")
+    proc.exit()
+    print("MARK:run:OK")
+except Exception:
+    traceback.print_exc()
+    failed = True
+
+sys.exit(1 if failed else 0)
+"""
 
-    def test_wheel_contains_bundled_binary(self, python_version, python_env):
-        """Test that the htty wheel contains the bundled ht binary - this should catch CI packaging issues."""
-        # This test only needs to run once, but we parametrize it to ensure it runs for each test session
-        if python_version != PYTHON_VERSIONS[0]:
-            pytest.skip("Only need to check wheel contents once")
 
-        print(f"🔍 Verifying wheel contains bundled ht binary: {python_env.htty_wheel}")
+@pytest.fixture(scope="session")
+def api_test_results(python_env) -> Tuple[int, str, Dict[str, str]]:
+    """Run every Python API scenario in a single interpreter, returning exit code, output and MARK results."""
+    exit_code, output = python_env.run_command(["python", "-c", API_TEST_SCRIPT, python_env.python_version])
+    marks = {}
+    for line in output.splitlines():
+        if line.startswith("MARK:"):
+            name, _, result = line[len("MARK:") :].partition(":")
+            marks[name] = result
+    return exit_code, output, marks
 
-        # Check that the wheel file exists and is reasonably sized
-        wheel_size = python_env.htty_wheel.stat().st_size
-        print(f"📦 Wheel size: {wheel_size:,} bytes ({wheel_size / 1024 / 1024:.1f} MB)")
 
-        # A wheel with bundled binary should be at least 1MB (ht binary is ~4MB)
-        assert wheel_size > 1024 * 1024, f"Wheel seems too small ({wheel_size:,} bytes), likely missing bundled binary"
+def test_wheel_contains_bundled_binary(htty_wheel):
+    """Test that the htty wheel contains the bundled ht binary - this should catch CI packaging issues."""
+    # This only inspects the zip, so it doesn't need (or pay for) a Python environment
+    print(f"🔍 Verifying wheel contains bundled ht binary: {htty_wheel}")
 
-        # The real test: verify the htty-ht console script would work
-        # This is the definitive test - if this works, the bundled binary is present and functional
-        print("🔧 Testing htty-ht console script functionality...")
+    # Check that the wheel file exists and is reasonably sized
+    wheel_size = htty_wheel.stat().st_size
+    print(f"📦 Wheel size: {wheel_size:,} bytes ({wheel_size / 1024 / 1024:.1f} MB)")
 
-        # We can't actually run htty-ht here since it's not installed yet,
-        # but we can verify the wheel contains the necessary files
-        with zipfile.ZipFile(python_env.htty_wheel, "r") as wheel_zip:
-            file_list = wheel_zip.namelist()
+    # A wheel with bundled binary should be at least 1MB (ht binary is ~4MB)
+    assert wheel_size > 1024 * 1024, f"Wheel seems too small ({wheel_size:,} bytes), likely missing bundled binary"
 
-            # Look for the bundled ht binary
-            bundled_files = [f for f in file_list if "_bundled" in f]
-            ht_binary_files = [f for f in file_list if f.endswith("htty/_bundled/ht")]
+    # The real test: verify the htty-ht console script would work
+    # This is the definitive test - if this works, the bundled binary is present and functional
+    print("🔧 Testing htty-ht console script functionality...")
 
-            print(f"📋 Bundled files in wheel: {bundled_files}")
-            print(f"🔧 ht binary files: {ht_binary_files}")
+    # We can't actually run htty-ht here since it's not installed yet,
+    # but we can verify the wheel contains the necessary files
+    with zipfile.ZipFile(htty_wheel, "r") as wheel_zip:
+        # Single pass over the central directory, stopping at the first match
+        ht_info = next((info for info in wheel_zip.infolist() if info.filename.endswith("htty/_bundled/ht")), None)
+        assert ht_info is not None, "Expected an ht binary in the wheel's htty/_bundled directory"
+        print(f"🔧 ht binary: {ht_info.filename} (mode {ht_info.external_attr >> 16:o})")
 
-            # Should have exactly one ht binary in _bundled directory
-            assert len(ht_binary_files) == 1, (
-                f"Expected exactly 1 ht binary, found {len(ht_binary_files)}: {ht_binary_files}"
-            )
+        # Check that the ht binary is reasonably sized (should be ~4MB)
+        ht_size = ht_info.file_size
+        print(f"🔧 ht binary size: {ht_size:,} bytes ({ht_size / 1024 / 1024:.1f} MB)")
 
-            ht_binary_path = ht_binary_files[0]
+        # ht binary should be at least 1MB
+        assert ht_size > 1024 * 1024, f"ht binary seems too small ({ht_size:,} bytes)"
 
-            # Check that the ht binary is reasonably sized (should be ~4MB)
-            ht_info = wheel_zip.getinfo(ht_binary_path)
-            ht_size = ht_info.file_size
-            print(f"🔧 ht binary size: {ht_size:,} bytes ({ht_size / 1024 / 1024:.1f} MB)")
+    print("✅ Wheel contains properly bundled ht binary")
+    print("   Note: The real validation is in test_console_script_htty_ht_* tests")
+    print("   which verify the console script actually works with the bundled binary")
 
-            # ht binary should be at least 1MB
-            assert ht_size > 1024 * 1024, f"ht binary seems too small ({ht_size:,} bytes)"
 
-        print("✅ Wheel contains properly bundled ht binary")
-        print("   Note: The real validation is in test_console_script_htty_ht_* tests")
-        print("   which verify the console script actually works with the bundled binary")
+class TestNixPython:
+    """Test htty functionality across Python versions using Python's virtualenv."""
 
-    def test_cli_help(self, python_version, python_env):
+    def test_cli_help(self, python_env):
         """Test that htty --help works."""
-        exit_code, output = python_env.run_command("htty --help")
+        exit_code, output = python_env.run_command(["htty", "--help"])
         assert exit_code == 0, f"htty --help failed: {output}"
         assert "usage: htty" in output.lower(), "Expected usage message"
         assert "ht terminal emulation" in output.lower(), "Expected description"
 
-    def test_cli_echo_capture(self, python_version, python_env):
+    def test_cli_echo_capture(self, python_env):
         """Test capturing echo command output."""
+        python_version = python_env.python_version
         exit_code, output = python_env.run_command(
-            f'htty --rows 5 --cols 40 -- echo "Test from Python {python_version}"'
+            ["htty", "--rows", "5", "--cols", "40", "--", "echo", f"Test from Python {python_version}"]
         )
 
         # Should work without binary architecture issues since we're using native nix
         assert exit_code == 0, f"htty echo failed: {output}"
         assert f"Test from Python {python_version}" in output, "Expected echo output"
 
-    def test_cli_terminal_size(self, python_version, python_env):
+    def test_cli_terminal_size(self, python_env):
         """Test that terminal size is properly set by checking text wrapping."""
-        # Copy the number_triangle.py script to the nix environment's working directory
-        script_path = Path(__file__).parent / "number_triangle.py"
-        python_env.copy_file(script_path, "number_triangle.py")
+        python_version = python_env.python_version
 
         # Use 5 rows × 4 cols to test both dimensions
         # The script outputs:
@@ -385,7 +511,7 @@ class TestNixPython:
         #   5      (remaining digit)
         #          (trailing newline)
         exit_code, output = python_env.run_command(
-            f"htty --rows 5 --cols 4 -- python{python_version} number_triangle.py"
+            ["htty", "--rows", "5", "--cols", "4", "--", f"python{python_version}", str(NUMBER_TRIANGLE_SCRIPT)]
         )
         assert exit_code == 0, f"htty test failed: {output}"
 
@@ -410,77 +536,63 @@ class TestNixPython:
         assert lines[2] == "5555", f"Expected '5555', got '{lines[2]}'"
         assert lines[3] == "5", f"Expected '5', got '{lines[3]}'"
 
-    def test_api_import(self, python_version, python_env):
+    def test_api_checks_all_pass(self, api_test_results):
+        """Test that every Python API scenario ran without raising."""
+        exit_code, output, _ = api_test_results
+        assert exit_code == 0, f"API checks failed: {output}"
+
+    def test_api_import(self, api_test_results):
         """Test that htty can be imported."""
-        exit_code, output = python_env.run_command("python -c \"import htty; print(f'Imported: {htty.__name__}')\"")
-        assert exit_code == 0, f"Import failed: {output}"
-        assert "Imported: htty" in output
+        _, output, marks = api_test_results
+        assert marks.get("import") == "htty", f"Import failed: {output}"
 
-    def test_api_create_ht_instance(self, python_version, python_env):
+    def test_api_create_ht_instance(self, api_test_results):
         """Test creating an ht_process instance."""
-        command = """python -c "
-from htty import ht_process
-with ht_process(['echo', 'test'], rows=10, cols=40) as proc:
-    print(f'Created ht_process instance: rows={proc.rows}, cols={proc.cols}')
-    snapshot = proc.snapshot()
-    print(f'Snapshot text length: {len(snapshot.text)}')
-    print('ht_process context manager successful')
-"
-"""
-        exit_code, output = python_env.run_command(command)
-        assert exit_code == 0, f"ht_process creation failed: {output}"
-        assert "Created ht_process instance: rows=10, cols=40" in output
-        assert "ht_process context manager successful" in output
+        _, output, marks = api_test_results
+        assert marks.get("instance") == "rows=10,cols=40", f"ht_process creation failed: {output}"
 
-    def test_api_run_command(self, python_version, python_env):
+    def test_api_run_command(self, api_test_results):
         """Test running a command via Python API."""
-        command = f"""python -c "
-from htty import run
-import time
-proc = run(['echo', 'Hello from API Python {python_version}'], rows=5, cols=40)
-time.sleep(0.5)  # Give command time to complete
-snapshot = proc.snapshot()
-print(f'Got snapshot with {{len(snapshot.text)}} chars')
-proc.exit()
-print('Command execution successful')
-"
-"""
-        exit_code, output = python_env.run_command(command)
-        assert exit_code == 0, f"Command execution failed: {output}"
-        assert "Command execution successful" in output
+        _, output, marks = api_test_results
+        assert marks.get("run") == "OK", f"Command execution failed: {output}"
 
-    def test_console_script_htty_help(self, python_version, python_env):
+    def test_console_script_htty_help(self, python_env):
         """Test that htty console script works and shows help."""
-        exit_code, output = python_env.run_command("htty --help")
+        exit_code, output = python_env.run_command(["htty", "--help"])
         assert exit_code == 0, f"htty console script failed: {output}"
         assert "usage: htty" in output.lower(), "Expected usage message from htty console script"
         assert "ht terminal emulation" in output.lower(), "Expected description from htty console script"
 
-    def test_console_script_htty_ht_help(self, python_version, python_env):
+    def test_console_script_htty_ht_help(self, python_env):
         """Test that htty-ht console script works and shows help."""
-        exit_code, output = python_env.run_command("htty-ht --help")
+        exit_code, output = python_env.run_command(["htty-ht", "--help"])
         assert exit_code == 0, f"htty-ht console script failed: {output}"
         assert "usage: ht" in output.lower(), "Expected usage message from htty-ht console script"
         assert "command to run inside the terminal" in output.lower(), (
             "Expected description from htty-ht console script"
         )
 
-    def test_console_script_htty_ht_version(self, python_version, python_env):
+    def test_console_script_htty_ht_version(self, python_env):
         """Test that htty-ht console script shows version."""
-        exit_code, output = python_env.run_command("htty-ht --version")
+        exit_code, output = python_env.run_command(["htty-ht", "--version"])
         assert exit_code == 0, f"htty-ht --version failed: {output}"
         assert "ht" in output.lower(), "Expected version output from htty-ht console script"
 
-    def test_console_scripts_functionality(self, python_version, python_env):
+    def test_console_scripts_functionality(self, python_env):
         """Test that both console scripts work with actual commands."""
+        python_version = python_env.python_version
         # Test htty console script with echo
-        exit_code, output = python_env.run_command(f'htty --rows 5 --cols 40 -- echo "Console test {python_version}"')
+        exit_code, output = python_env.run_command(
+            ["htty", "--rows", "5", "--cols", "40", "--", "echo", f"Console test {python_version}"]
+        )
         assert exit_code == 0, f"htty console script with echo failed: {output}"
         assert f"Console test {python_version}" in output, "Expected echo output from htty console script"
 
         # Test htty-ht console script with echo (using ht directly)
         # Use a larger terminal size to avoid edge cases with very small terminals
-        exit_code, output = python_env.run_command(f'htty-ht --size 40x10 -- echo "Direct ht test {python_version}"')
+        exit_code, output = python_env.run_command(
+            ["htty-ht", "--size", "40x10", "--", "echo", f"Direct ht test {python_version}"]
+        )
 
         # If htty-ht fails, it might be due to ht binary issues, but we should still get some output
         if exit_code != 0:
@@ -488,33 +600,14 @@ print('Command execution successful')
             # and might have platform-specific issues that don't affect htty functionality
             print(f"Warning: htty-ht failed for Python {python_version}: {output}")
             # At minimum, verify that htty-ht exists and can show help
-            help_exit_code, help_output = python_env.run_command("htty-ht --help")
+            help_exit_code, help_output = python_env.run_command(["htty-ht", "--help"])
             assert help_exit_code == 0, f"htty-ht --help failed: {help_output}"
         else:
             # If it succeeds, that's great - just verify we got some output
             assert output.strip(), "Expected some output from htty-ht command"
 
-
-class TestNixPythonConsistency:
-    """Test that ensures functionality is consistent across Python versions."""
-
-    def test_version_consistency(self, workspace_root, htty_wheel):
-        """Test that all Python versions produce similar results."""
-        test_cmd = "python -c \"import htty; print(f'Python: {htty.__name__} imported successfully')\""
-
-        results = {}
-        for version in PYTHON_VERSIONS:
-            env = PythonEnvironment(version, workspace_root, htty_wheel)
-            env.setup()
-            try:
-                exit_code, output = env.run_command(test_cmd)
-                results[version] = (exit_code, output)
-            finally:
-                env.cleanup()
-
-        # All should succeed
-        for version, (exit_code, output) in results.items():
-            assert exit_code == 0, f"Python {version} failed: {output}"
-            assert "htty imported successfully" in output
-
-        print(f"✅ All Python versions ({', '.join(results.keys())}) work consistently")
+    def test_grouped_by_python_version(self, request, python_env):
+        """Test that the tests for one Python version share an xdist group, so only one worker builds its venv."""
+        if not getattr(request.config.option, "loadgroup", False):
+            pytest.skip("only applies when run with `--dist loadgroup`")
+        assert request.node.nodeid.endswith(f"@py{python_env.python_version}"), request.node.nodeid